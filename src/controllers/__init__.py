@@ -1,5 +1,10 @@
 from .file_upload_controller import upload_file_service
+from .presigned_upload_controller import init_upload_service, commit_upload_service
+from .embedding_status_controller import embedding_status_service
 
 __all__ = [
-        "upload_file_service"
+        "upload_file_service",
+        "init_upload_service",
+        "commit_upload_service",
+        "embedding_status_service"
         ]
\ No newline at end of file
@@ -0,0 +1,84 @@
+import asyncio
+from typing import Dict, Optional, Set
+
+from fastapi import HTTPException, Request
+
+from lib import EmbeddingStatusResponse, RedisClient, dependencies
+
+# longest a status request may wait for the job to finish
+MAX_STATUS_WAIT = 30
+FINAL_STATUSES = ("Completed", "Failed")
+STATUS_CHANNEL_PREFIX = "embed:status:"
+
+# queues of the requests waiting on each embedding id, fed by the process-wide listener so a waiting
+# request does not hold a connection of its own
+_status_waiters: Dict[str, Set["asyncio.Queue[str]"]] = {}
+_status_listener: Optional["asyncio.Task[None]"] = None
+_listener_ready = asyncio.Event()
+
+
+async def _run_status_listener(file_cache_client: RedisClient, ready: asyncio.Event) -> None:
+    try:
+        async with file_cache_client.client.pubsub() as pubsub:
+            await pubsub.psubscribe(f"{STATUS_CHANNEL_PREFIX}*")
+            ready.set()
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                embedding_id = message["channel"].decode()[len(STATUS_CHANNEL_PREFIX):]
+                status = message["data"].decode()
+                for waiter in _status_waiters.get(embedding_id, ()):
+                    waiter.put_nowait(status)
+    finally:
+        # a listener that could not subscribe releases its waiters, which then wait out their timeout
+        # and answer with the stored status; the next request starts a new listener
+        ready.set()
+
+
+async def _ensure_status_listener(file_cache_client: RedisClient) -> None:
+    global _status_listener
+    if _status_listener is None or _status_listener.done():
+        _listener_ready.clear()
+        _status_listener = asyncio.create_task(_run_status_listener(file_cache_client, _listener_ready))
+    # the listener has to be subscribed before the status is read, or an update published in between
+    # would be missed
+    await _listener_ready.wait()
+
+
+async def embedding_status_service(request: Request, embedding_id: str, wait: float = 0) -> EmbeddingStatusResponse:
+    # With `wait`, a Pending or Processing job is held open until its status changes to Completed or
+    # Failed or the wait runs out, instead of the client polling
+    file_cache_client = dependencies.get_file_cache_client(request)
+    wait = min(max(wait, 0), MAX_STATUS_WAIT)
+    waiter: Optional["asyncio.Queue[str]"] = None
+    if wait:
+        await _ensure_status_listener(file_cache_client)
+        waiter = asyncio.Queue()
+        _status_waiters.setdefault(embedding_id, set()).add(waiter)
+
+    try:
+        # read from the server rather than the local cache, which does not see other workers' writes
+        stored = await file_cache_client.client.get(f"embedding_status:{embedding_id}")
+        if not stored:
+            raise HTTPException(status_code=404, detail=f"Embedding job with ID '{embedding_id}' not found")
+        status = stored.decode()
+
+        if waiter is not None:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + wait
+            while status not in FINAL_STATUSES:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    status = await asyncio.wait_for(waiter.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+        return EmbeddingStatusResponse(embedding_id=embedding_id, status=status)
+    finally:
+        if waiter is not None:
+            waiters = _status_waiters.get(embedding_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del _status_waiters[embedding_id]
@@ -1,36 +1,64 @@
-import json
 import os
 import uuid
-from datetime import datetime, timezone
-from hashlib import sha256
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
 from fastapi import BackgroundTasks, HTTPException, Request, UploadFile
 
-from lib import dependencies
-from services import file_validation, process_embedding
+from lib import EmbeddingsCache, dependencies, utcnow_iso
+from services import HashingReader, enqueue_embedding, file_validation, hash_file
 
 # from services.embedding import process_embedding
 
+
+async def get_file_state(file_cache_client: Any, embeddings_cache: EmbeddingsCache, file_hash: str, collection: str) -> Tuple[Any, bool]:
+    # The stored metadata and whether the content is already in the collection, read in one MGET
+    metadata, indexed = await file_cache_client.get_many([file_hash, embeddings_cache.indexed_key(file_hash, collection)])
+    return metadata, indexed is not None
+
 async def upload_file_service(
     request: Request,
     background_tasks: BackgroundTasks,
     file: UploadFile,
+    collection: str,
     current_user: Any,
 ) -> Dict[str, Any]:
     
     # Get shared resources from app.state via dependency helper functions
     file_cache_client = dependencies.get_file_cache_client(request)
-    general_cache_client = dependencies.get_general_cache_client(request)
     s3_pool = dependencies.get_s3_pool(request)
     env = dependencies.get_env(request)
+    embeddings_cache = EmbeddingsCache(file_cache_client, dependencies.get_embedding_client(request).model)
+    bucket_name = s3_pool.bucket
 
 
     try:
-        # Validate and read the file; file_validation will raise if type unsupported
-        file = file_validation(file)
-        file_content = await file.read()
-        file_hash = sha256(file_content).hexdigest()
+        # File(...) only guarantees that a part was sent; its name decides the type, so a nameless or
+        # unsupported file is rejected as a client error before any hashing or upload work
+        if not file.filename:
+            raise HTTPException(status_code=400, detail="File name is required")
+        try:
+            file = file_validation(file)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        parallel_hash = str(env.get("PARALLEL_FILE_HASH", "false")).lower() in ("1", "true")
+        hash_during_upload = str(env.get("HASH_DURING_UPLOAD", "false")).lower() in ("1", "true")
+
+        staged_key: Optional[str] = None
+        existing_file_metadata: Any = None
+        if hash_during_upload and not parallel_hash:
+            # Hash and upload in one pass under a staging key; the object is renamed to its hash
+            # afterwards, or dropped if the file turns out to be a duplicate.
+            staged_key = f"staging/{uuid.uuid4()}"
+            reader = HashingReader(file.file)
+            server, upload_success = await s3_pool.upload_file(bucket_name, staged_key, reader)  # type: ignore[arg-type]
+            if not upload_success:
+                raise HTTPException(status_code=500, detail="Failed to upload file to S3")
+            file_hash = reader.hexdigest()
+            existing_file_metadata, embedded = await get_file_state(file_cache_client, embeddings_cache, file_hash, collection)
+        else:
+            file_hash = await hash_file(file, parallel=parallel_hash)
+            existing_file_metadata, embedded = await get_file_state(file_cache_client, embeddings_cache, file_hash, collection)
 
         file_type = getattr(file, "file_type", "TXT") 
         original_name = getattr(file, "file_name", "unknown")
@@ -38,26 +66,34 @@ async def upload_file_service(
 
 
         # Check for existing file metadata
-        existing_file_metadata = file_cache_client.get_value(file_hash)
         if existing_file_metadata:
             # Convert to dict if stored as JSON
             metadata = (
                 existing_file_metadata
                 if isinstance(existing_file_metadata, dict)
-                else json.loads(existing_file_metadata)
+                else orjson.loads(existing_file_metadata)
             )
-            if current_user.user_id not in metadata.get("users", []):
-                metadata["users"].append(current_user.user_id)
+            metadata_changed = current_user.user_id not in metadata.get("users", [])
+            if metadata_changed:
+                metadata.setdefault("users", []).append(current_user.user_id)
+            if staged_key:
+                background_tasks.add_task(s3_pool.delete_file_server, bucket_name, staged_key, server)
+            server = metadata["server"]
         else:
-            # Upload file using S3Pool
-            server, upload_success = await s3_pool.upload_file(
-                str(env["BUCKET_NAME"]), f"{file_hash}/{file_hash}", file_content
-            )
+            if staged_key:
+                upload_success = await s3_pool.move_file_server(
+                    bucket_name, staged_key, f"{file_hash}/{file_hash}", server
+                )
+            else:
+                # Upload file using S3Pool, streaming the spooled upload rather than reading it into memory
+                server, upload_success = await s3_pool.upload_file(
+                    bucket_name, f"{file_hash}/{file_hash}", file.file
+                )
             print(f"File uploaded to S3: {upload_success}")
             if not upload_success:
                 raise HTTPException(status_code=500, detail="Failed to upload file to S3")
             metadata = {
-                "uploaded": datetime.now(timezone.utc).isoformat(),
+                "uploaded": utcnow_iso(),
                 "server": server,
                 "users": [current_user.user_id],
                 "file_type": file_type,
@@ -65,17 +101,43 @@ async def upload_file_service(
                 "orignal_name": original_name, 
                 "orignal_type": original_extension
             }
-            file_cache_client.set_value(file_hash, metadata)
-            
-            metadata_bytes = json.dumps(metadata).encode('utf-8')
-            if not s3_pool.upload_file_server(str(env["BUCKET_NAME"]), "data.json", metadata_bytes, server ):
-                raise HTTPException(status_code=500, detail="Failed to upload metadata to S3")
+            # Stored only if the key is still missing (SET NX), so a concurrent upload of the same new
+            # file can not overwrite the other's user list; the one that loses joins the stored entry
+            stored_metadata = await file_cache_client.get_or_set(file_hash, metadata)
+            if isinstance(stored_metadata, dict) and stored_metadata != metadata:
+                if stored_metadata["server"] != server:
+                    background_tasks.add_task(s3_pool.delete_file_server, bucket_name, f"{file_hash}/{file_hash}", server)
+                metadata = stored_metadata
+                metadata_changed = current_user.user_id not in metadata.get("users", [])
+                if metadata_changed:
+                    metadata.setdefault("users", []).append(current_user.user_id)
+                server = metadata["server"]
+            else:
+                # written again with the other cache writes if the script failed
+                metadata_changed = stored_metadata is None
+                # The cache entry is the canonical metadata, so the server copy is written after the
+                # response and retried there instead of costing the client another round-trip
+                metadata_bytes = orjson.dumps(metadata)
+                background_tasks.add_task(
+                    s3_pool.upload_file_server_with_retry, bucket_name, "data.json", metadata_bytes, server
+                )
 
+        # Content already added to this collection is not embedded again
         embedding_id = str(uuid.uuid4())
-        general_cache_client.set_value(f"embedding_status:{embedding_id}", "Pending", expire_time=3600)
-        background_tasks.add_task(process_embedding, file_hash, embedding_id, file, request, server)
+        # The metadata write and the embedding status go out in one pipelined round-trip
+        cache_writes: List[Tuple[str, Any, Optional[int]]] = [
+            (f"embedding_status:{embedding_id}", "Completed" if embedded else "Pending", 3600)
+        ]
+        if metadata_changed:
+            cache_writes.append((file_hash, metadata, None))
+        await file_cache_client.set_many(cache_writes)
+        if not embedded:
+            # Queued for the embedding worker, which batches jobs instead of running one task per upload
+            await enqueue_embedding(request, file_hash, embedding_id, server, original_name, collection)
         return {"message": "File uploaded successfully", "embedding_id": embedding_id}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
     
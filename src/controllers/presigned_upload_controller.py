@@ -0,0 +1,159 @@
+import logging
+import os
+import tempfile
+import uuid
+from typing import Any, Dict
+
+import orjson
+from fastapi import BackgroundTasks, HTTPException, Request, UploadFile
+
+from lib import EmbeddingsCache, classify, dependencies, utcnow_iso
+from services import enqueue_embedding, file_validation, hash_file, set_embedding_status
+
+from .file_upload_controller import get_file_state
+
+logger = logging.getLogger(__name__)
+
+PENDING_UPLOAD_TTL = 3600
+DOWNLOAD_SPOOL_SIZE = 1024 * 1024
+
+
+async def init_upload_service(
+    request: Request,
+    file_name: str,
+    current_user: Any,
+) -> Dict[str, Any]:
+    file_cache_client = dependencies.get_file_cache_client(request)
+    s3_pool = dependencies.get_s3_pool(request)
+
+    if classify(file_name) is None:
+        _, ext = os.path.splitext(file_name)
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {ext.lower()}")
+
+    # The client uploads to a staging key on the least loaded server; the object is only renamed to
+    # its hash once the commit has been verified.
+    upload_id = str(uuid.uuid4())
+    staged_key = f"staging/{upload_id}"
+    server = await s3_pool.get_least_loaded_server()
+    presigned_url = await s3_pool.presigned_upload_url_server(s3_pool.bucket, staged_key, server)
+    if not presigned_url:
+        raise HTTPException(status_code=500, detail="Failed to create upload URL")
+
+    await file_cache_client.set_value(
+        f"pending_upload:{upload_id}",
+        {"server": server, "key": staged_key, "user": current_user.user_id, "file_name": file_name},
+        expire_time=PENDING_UPLOAD_TTL
+    )
+    return {"upload_id": upload_id, "presigned_url": presigned_url}
+
+
+async def commit_upload_service(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    upload_id: str,
+    file_hash: str,
+    collection: str,
+    current_user: Any,
+) -> Dict[str, Any]:
+    file_cache_client = dependencies.get_file_cache_client(request)
+
+    # taken in one GETDEL, so of two concurrent commits of the same upload only one proceeds
+    pending = await file_cache_client.pop_value(f"pending_upload:{upload_id}")
+    if not isinstance(pending, dict) or pending.get("user") != current_user.user_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    embedding_id = str(uuid.uuid4())
+    await file_cache_client.set_value(f"embedding_status:{embedding_id}", "Pending", expire_time=3600)
+    background_tasks.add_task(
+        finalize_upload, request, pending, file_hash.lower(), embedding_id, current_user.user_id, collection
+    )
+    return {"message": "Upload committed", "embedding_id": embedding_id}
+
+
+async def finalize_upload(
+    request: Request,
+    pending: Dict[str, Any],
+    claimed_hash: str,
+    embedding_id: str,
+    user_id: str,
+    collection: str,
+) -> None:
+    # Runs after the commit response. The client's hash decides where the file is stored and who can
+    # share it, so it is checked against the staged object before anything is written under it.
+    file_cache_client = dependencies.get_file_cache_client(request)
+    s3_pool = dependencies.get_s3_pool(request)
+    bucket_name = s3_pool.bucket
+    server = pending["server"]
+    staged_key = pending["key"]
+
+    spool = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_SIZE)
+    file = UploadFile(file=spool, filename=pending["file_name"])  # type: ignore[arg-type]
+    try:
+        downloaded = await s3_pool.download_file_server(bucket_name, staged_key, spool, server)  # type: ignore[arg-type]
+        if downloaded:
+            file = file_validation(file)
+            # the client claims a plain sha256, so it is checked against one even where uploads are
+            # otherwise stored under the parallel tree hash
+            file_hash = await hash_file(file)
+        if not downloaded or file_hash != claimed_hash:
+            logger.warning("Rejected upload %s: content does not match the committed hash", staged_key)
+            await s3_pool.delete_file_server(bucket_name, staged_key, server)
+            await set_embedding_status(file_cache_client, embedding_id, "Failed")
+            return
+
+        embeddings_cache = EmbeddingsCache(file_cache_client, dependencies.get_embedding_client(request).model)
+        existing_file_metadata, embedded = await get_file_state(file_cache_client, embeddings_cache, file_hash, collection)
+        metadata_changed = True
+        if existing_file_metadata:
+            metadata = (
+                existing_file_metadata
+                if isinstance(existing_file_metadata, dict)
+                else orjson.loads(existing_file_metadata)
+            )
+            metadata_changed = user_id not in metadata.get("users", [])
+            if metadata_changed:
+                metadata.setdefault("users", []).append(user_id)
+            await s3_pool.delete_file_server(bucket_name, staged_key, server)
+            server = metadata["server"]
+        else:
+            if not await s3_pool.move_file_server(bucket_name, staged_key, f"{file_hash}/{file_hash}", server):
+                await set_embedding_status(file_cache_client, embedding_id, "Failed")
+                return
+            metadata = {
+                "uploaded": utcnow_iso(),
+                "server": server,
+                "users": [user_id],
+                "file_type": getattr(file, "file_type", "TXT"),
+                "related_data": [],
+                "orignal_name": getattr(file, "file_name", "unknown"),
+                "orignal_type": getattr(file, "file_extension", "unknown")
+            }
+            # Stored only if the key is still missing, so a concurrent upload of the same file joins the
+            # stored entry instead of overwriting it
+            stored_metadata = await file_cache_client.get_or_set(file_hash, metadata)
+            if isinstance(stored_metadata, dict) and stored_metadata != metadata:
+                if stored_metadata["server"] != server:
+                    await s3_pool.delete_file_server(bucket_name, f"{file_hash}/{file_hash}", server)
+                metadata = stored_metadata
+                metadata_changed = user_id not in metadata.get("users", [])
+                if metadata_changed:
+                    metadata.setdefault("users", []).append(user_id)
+                server = metadata["server"]
+            else:
+                # written again with the other cache writes if the script failed
+                metadata_changed = stored_metadata is None
+                await s3_pool.upload_file_server_with_retry(bucket_name, "data.json", orjson.dumps(metadata), server)
+
+        if metadata_changed:
+            await file_cache_client.set_value(file_hash, metadata)
+
+        if embedded:
+            await set_embedding_status(file_cache_client, embedding_id, "Completed")
+        else:
+            await enqueue_embedding(request, file_hash, embedding_id, server, pending["file_name"], collection)
+    except Exception:
+        # the client is polling this status, which would otherwise stay Pending
+        logger.exception("Finalizing upload %s failed", staged_key)
+        await set_embedding_status(file_cache_client, embedding_id, "Failed")
+    finally:
+        await file.close()
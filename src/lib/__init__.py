@@ -9,12 +9,15 @@ from .dependencies import (
             get_s3_pool,
             get_croma_client,
             get_llm_client,
-            get_embedding_client
+            get_embedding_client,
+            validate_app_state
 )
-from .models import FILE_TYPE_MAP, EmbeddingStatusResponse, RemoveKeyRequest
+from .models import FILE_TYPE_MAP, FILE_CATEGORIES, classify, EmbeddingStatusResponse, RemoveKeyRequest, InitUploadRequest, CommitUploadRequest
 from .user import User
+from .revocation import RevocationFilter
+from .utils import utcnow_iso
 from .llm import GoogleLLMClient, LLMClient
-from .embed import VoyageAIEmbeddingClient, EmbeddingClient
+from .embed import VoyageAIEmbeddingClient, EmbeddingClient, EmbeddingsCache, CachedEmbeddingClient, quantize_embedding, dequantize_embedding, encode_embedding, decode_embedding
 
 __all__ = [
             "MySQLClient",
@@ -23,8 +26,11 @@ __all__ = [
             "S3Pool",
             "Auth",
             "User", 
+            "RevocationFilter",
             "EmbeddingStatusResponse",
             "RemoveKeyRequest",
+            "InitUploadRequest",
+            "CommitUploadRequest",
             "get_mysql_client", 
             "get_general_cache_client", 
             "get_file_cache_client", 
@@ -32,6 +38,8 @@ __all__ = [
             "get_env", 
             "get_current_user",
             "FILE_TYPE_MAP",
+            "FILE_CATEGORIES",
+            "classify",
             "CromaDBClient",
             "get_croma_client",
             "GoogleLLMClient",
@@ -39,7 +47,15 @@ __all__ = [
             "get_llm_client",
             "VoyageAIEmbeddingClient",
             "EmbeddingClient",
-            "get_embedding_client"
+            "EmbeddingsCache",
+            "CachedEmbeddingClient",
+            "get_embedding_client",
+            "quantize_embedding",
+            "dequantize_embedding",
+            "encode_embedding",
+            "decode_embedding",
+            "validate_app_state",
+            "utcnow_iso"
             ]
 
 # for i in __all__:
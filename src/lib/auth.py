@@ -1,17 +1,64 @@
+import asyncio
+import base64
 import time
 from hashlib import sha256
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import httpx
+import orjson
 import redis
 from fastapi import HTTPException
-from jose import jwt
+from jose import jwk, jwt
+
+from .revocation import REVOKED_TOKENS_CHANNEL, REVOKED_TOKENS_SET, RevocationFilter
+
+JWKS_TTL = 3600
+# a token signed with a kid missing from the cached JWKS forces a fetch of the set, at most once per
+# domain in this many seconds, so rotated keys are picked up without refetching for every bad token
+JWKS_REFRESH_INTERVAL = 30
+
+# JWKS per Auth0 domain with the time it was fetched and its RSA keys already constructed, keyed by
+# kid; shared by every Auth instance in the process.
+_JWKS_CACHE: Dict[str, Tuple[float, Dict[str, Any], Dict[str, Any]]] = {}
+# when each domain's JWKS was last fetched because of an unknown kid
+_JWKS_FORCED_AT: Dict[str, float] = {}
+
+# Auth0 management tokens per domain with their expiry time, shared the same way and backed by Redis
+# so every worker uses one token until it expires
+_MGMT_TOKEN_CACHE: Dict[str, Tuple[float, str]] = {}
+# how long the worker fetching a new management token holds the lock, and how long others wait for it
+MGMT_TOKEN_LOCK_TTL = 10
+MGMT_TOKEN_WAIT = 5
+MGMT_TOKEN_POLL_INTERVAL = 0.1
+
+
+def _build_rsa_keys(jwks: Dict[str, Any]) -> Dict[str, Any]:
+    # Constructing the key from n/e is the expensive part of verification, so do it once per JWKS load
+    rsa_keys: Dict[str, Any] = {}
+    for key in jwks.get("keys", []):
+        if not isinstance(key, dict) or key.get("kty") != "RSA" or not key.get("kid"):
+            continue
+        try:
+            rsa_keys[key["kid"]] = jwk.construct({k: key.get(k) for k in ["kty", "kid", "use", "n", "e"]}, "RS256")
+        except Exception as e:
+            print(f"Skipping unusable JWKS key {key.get('kid')}: {str(e)}")
+    return rsa_keys
+
+
+def _unverified_header(token: str) -> Dict[str, Any]:
+    # Only the header segment is needed to pick the signing key, so decode it directly rather than
+    # letting jose parse the whole token a second time before jwt.decode does.
+    header_b64 = token.split(".", 1)[0]
+    header = orjson.loads(base64.urlsafe_b64decode(header_b64 + "=" * (-len(header_b64) % 4)))
+    if not isinstance(header, dict):
+        raise ValueError("Token header is not a JSON object")
+    return header
 
 
 # The `Auth` class in Python handles authentication using environment variables, Redis client, token
 # management, JWT decoding, and token revocation checks.
 class Auth:
-    def __init__(self, env: Dict[str, str], redis_client: redis.StrictRedis, token: Optional[str] = None) -> None:
+    def __init__(self, env: Dict[str, str], redis_client: redis.StrictRedis, token: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None, revocation_filter: Optional[RevocationFilter] = None) -> None:
         """
         The function initializes various attributes related to authentication using environment
         variables and a Redis client in Python.
@@ -43,6 +90,17 @@ class Auth:
         
         .-.-.-.
         
+        @ param http_client (Optional[httpx.AsyncClient])  - The `http_client` parameter is an optional
+        shared `httpx.AsyncClient` used for calls to Auth0. Reusing the application's client keeps its
+        connections warm; if it is not provided a short lived client is created per call.
+        
+        .-.-.-.
+        
+        @ param revocation_filter (Optional[RevocationFilter])  - The process wide Bloom filter of
+        revoked tokens. When provided, tokens that are definitely not revoked skip the Redis lookup.
+        
+        .-.-.-.
+        
         
         """
 
@@ -55,11 +113,17 @@ class Auth:
         self.auth0_mgmt_audience = f"https://{self.auth0_domain}/api/v2/"
 
         self.redis_client = redis_client
+        self.http_client = http_client
+        self.revocation_filter = revocation_filter
 
         self.token = token
         self.payload: Dict[str, Any] = {}        
 
-        self.known_jwks: Dict[str, Dict[str, str]] = {}
+        self._token_hash: Optional[str] = None
+        self._hashed_token: Optional[str] = None
+
+        self.known_jwks: Dict[str, Any] = {}
+        self.rsa_keys: Dict[str, Any] = {}
 
         self.auth0_mgmt_token = ""
         self.auth0_mgmt_token_expiry = 0
@@ -67,6 +131,43 @@ class Auth:
 
 
 
+    async def http_request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        The function `http_request` sends a request through the shared `http_client`, so calls to Auth0
+        reuse its warm connections; without one it falls back to a short-lived client.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param method (str)  - The HTTP method, e.g. "GET".
+        
+        .-.-.-.
+        
+        @ param url (str)  - The URL to request.
+        
+        .-.-.-.
+        
+        @ param kwargs ()  - Passed on to `httpx.AsyncClient.request`, e.g. `headers` or `json`.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `httpx.Response`.
+        
+        .-.-.-.
+        
+        
+        """
+        if self.http_client is not None:
+            return await self.http_client.request(method, url, **kwargs)
+        async with httpx.AsyncClient() as client:
+            return await client.request(method, url, **kwargs)
+
     def get_token_hash(self) -> str:
         """
         The function `get_token_hash` takes a token as input, checks if it exists, and returns its
@@ -75,14 +176,15 @@ class Auth:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         
         
         @ returns The `get_token_hash` method returns the SHA-256 hash of the token attribute after
-        encoding it.
+        encoding it. The hash is memoized per token, so repeated calls during a request only hash once
+        and a replaced token is rehashed.
         
         .-.-.-.
         
@@ -90,32 +192,44 @@ class Auth:
         """
         if not self.token:
             raise HTTPException(status_code=401, detail="Token is required")
-        return sha256(self.token.encode()).hexdigest()
+        if self._token_hash is None or self._hashed_token != self.token:
+            self._token_hash = sha256(self.token.encode()).hexdigest()
+            self._hashed_token = self.token
+        return self._token_hash
         
 
     async def revoke_token(self) -> None:
         """
         This Python async function revokes a token by setting it as revoked in a Redis cache with an
-        expiration time.
+        expiration time, recording it in the revoked token set, and publishing it so every process adds
+        it to its revocation filter.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         
         """
         try:
-            if self.payload:
-                exp = self.payload.get("exp", int(time.time()) + 3600)
-                token_hash = self.get_token_hash()
-            else:
-                self.payload = self.decode_jwt()
-            
-                self.redis_client.setex(f"revoked_token:{token_hash}", exp - int(time.time()), "revoked")
-                print(f"Token revoked and will expire in {exp - int(time.time())} seconds.")
+            if not self.payload:
+                self.payload = await self.decode_jwt()
+            exp = self.payload.get("exp", int(time.time()) + 3600)
+            token_hash = self.get_token_hash()
+            ttl = exp - int(time.time())
+            if ttl <= 0:
+                return
+
+            pipe = self.redis_client.pipeline()
+            pipe.setex(f"revoked_token:{token_hash}", ttl, "revoked")
+            pipe.sadd(REVOKED_TOKENS_SET, token_hash)
+            pipe.publish(REVOKED_TOKENS_CHANNEL, token_hash)
+            pipe.execute()
+            if self.revocation_filter is not None:
+                self.revocation_filter.add(token_hash)
+            print(f"Token revoked and will expire in {ttl} seconds.")
         except Exception as e:
             print(f"Failed to revoke token: {str(e)}")
 
@@ -127,51 +241,108 @@ class Auth:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         
         
         @ returns The function `is_token_revoked` returns a boolean value indicating whether the token
-        is revoked or not. It checks if a token hash exists in a Redis database under the key
-        "revoked_token:{token_hash}". If the token hash exists, it returns `True`, indicating that the
-        token is revoked. Otherwise, it returns `False`, indicating that the token is not revoked.
+        is revoked or not. If a revocation filter is set and it has never seen the token hash, the token
+        is not revoked and Redis is not queried. Otherwise it checks if the key
+        "revoked_token:{token_hash}" exists in Redis, which also rules out Bloom filter false positives.
         
         .-.-.-.
         
         
         """
         token_hash = self.get_token_hash()
-        result = await self.redis_client.exists(f"revoked_token:{token_hash}")
-        return bool(result > 0)
+        if self.revocation_filter is not None and not self.revocation_filter.might_contain(token_hash):
+            return False
+        result = self.redis_client.exists(f"revoked_token:{token_hash}")
+        return bool(result > 0)  # type: ignore[operator]
 
-    def get_jwks(self) -> Dict[str, Dict[str, str]]:
+    async def get_jwks(self, force: bool = False) -> Dict[str, Any]:
         """
         This Python function retrieves and returns a JSON Web Key Set (JWKS) from a specified URL.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
+        @ param force (bool)  - When True, the process and Redis caches are skipped and the set is
+        fetched over HTTPS, e.g. after a token names a kid the cached set does not have.
         
+        .-.-.-.
         
-        @ returns The `get_jwks` method returns a dictionary where the keys are strings and the values
-        are dictionaries with string keys and string values. The method fetches JSON Web Key Set (JWKS)
-        from a specified URL and assigns it to `self.known_jwks` attribute before returning it.
+        
+        
+        @ returns The `get_jwks` method returns the JSON Web Key Set (JWKS) for the Auth0 domain and
+        assigns it to the `self.known_jwks` attribute before returning it, along with its RSA keys in
+        `self.rsa_keys`, constructed once per load and keyed by kid. The set is served from the
+        process cache, then from Redis, and is only fetched over HTTPS when both are older than
+        `JWKS_TTL` seconds.
         
         .-.-.-.
         
         
         """
-        jwks_url = f"https://{self.auth0_domain}/.well-known/jwks.json"
-        self.known_jwks = httpx.get(jwks_url).json()
+        cached = _JWKS_CACHE.get(self.auth0_domain)
+        if not force and cached and cached[0] + JWKS_TTL > time.time():
+            self.known_jwks = cached[1]
+            self.rsa_keys = cached[2]
+            return self.known_jwks
+
+        cache_key = f"jwks:{self.auth0_domain}"
+        stored = None
+        if not force:
+            try:
+                stored = self.redis_client.get(cache_key)
+            except Exception as e:
+                print(f"Failed to read JWKS from cache: {str(e)}")
+
+        if stored:
+            return self._set_jwks(orjson.loads(stored))
+        else:
+            jwks_url = f"https://{self.auth0_domain}/.well-known/jwks.json"
+            resp = await self.http_request("GET", jwks_url)
+            if resp.status_code != 200:
+                raise HTTPException(status_code=503, detail="Failed to retrieve JWKS")
+            jwks = orjson.loads(resp.content)
+            try:
+                self.redis_client.setex(cache_key, JWKS_TTL, orjson.dumps(jwks))
+            except Exception as e:
+                print(f"Failed to cache JWKS: {str(e)}")
+        return self._set_jwks(jwks)
+
+    def _get_mgmt_token(self, cache_key: str) -> Optional[str]:
+        # the token from Redis with its remaining ttl, kept in the process cache until it expires
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(cache_key)
+            pipe.ttl(cache_key)
+            stored, ttl = pipe.execute()
+        if not stored or ttl <= 0:
+            return None
+        token = stored.decode() if isinstance(stored, bytes) else stored
+        self.auth0_mgmt_token = token
+        self.auth0_mgmt_token_expiry = time.time() + ttl
+        _MGMT_TOKEN_CACHE[self.auth0_domain] = (self.auth0_mgmt_token_expiry, token)
+        return token
+
+    def _jwks_cached(self) -> bool:
+        cached = _JWKS_CACHE.get(self.auth0_domain)
+        return bool(cached and cached[0] + JWKS_TTL > time.time())
+
+    def _set_jwks(self, jwks: Dict[str, Any]) -> Dict[str, Any]:
+        self.rsa_keys = _build_rsa_keys(jwks)
+        _JWKS_CACHE[self.auth0_domain] = (time.time(), jwks, self.rsa_keys)
+        self.known_jwks = jwks
         return self.known_jwks
 
-    def decode_jwt(self) -> Dict[str, Any]:
+    async def decode_jwt(self) -> Dict[str, Any]:
         """
         The function `decode_jwt` decodes a JSON Web Token (JWT) using RSA key from JWKS and verifies it
         with specified algorithms, audience, and issuer.
@@ -179,7 +350,7 @@ class Auth:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -188,27 +359,29 @@ class Auth:
         @ returns The `decode_jwt` method is returning the decoded payload from the JWT token if the
         verification is successful. If the JWT verification fails due to any reason, it will raise an
         HTTPException with a status code of 401 and provide details about the failure. If no valid key
-        is found in the JWKS, it will also raise an HTTPException with a status code of 401 indicating
-        the issue.
+        is found in the JWKS, even after refetching it (at most once every `JWKS_REFRESH_INTERVAL`
+        seconds), it will also raise an HTTPException with a status code of 401 indicating the issue.
         
         .-.-.-.
         
         
         """
-        jwks = self.get_jwks()
+        await self.get_jwks()
 
         try:
-            unverified_header = jwt.get_unverified_header(self.token)
+            unverified_header = _unverified_header(str(self.token))
         except Exception as e:
             raise HTTPException(status_code=401, detail=f"Invalid token format: {str(e)}")
 
-        rsa_key: Dict[str, str] = {}
-        for key in jwks["keys"]:
-            if isinstance(key, dict) and isinstance(unverified_header, dict) and key.get("kid") == unverified_header.get("kid"):
-                rsa_key = {k: key.get(k) for k in ["kty", "kid", "use", "n", "e"]}
-                break
+        kid = str(unverified_header.get("kid"))
+        rsa_key = self.rsa_keys.get(kid)
+        # an unknown kid may be a key rotated in since the set was cached; refetch it, rate limited
+        if rsa_key is None and _JWKS_FORCED_AT.get(self.auth0_domain, 0) + JWKS_REFRESH_INTERVAL <= time.time():
+            _JWKS_FORCED_AT[self.auth0_domain] = time.time()
+            await self.get_jwks(force=True)
+            rsa_key = self.rsa_keys.get(kid)
 
-        if rsa_key:
+        if rsa_key is not None:
             try:
                 self.payload = jwt.decode(
                     self.token,
@@ -231,7 +404,7 @@ class Auth:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -239,7 +412,8 @@ class Auth:
         
         @ returns The `verify_session` method returns a dictionary containing the decoded payload of the
         JWT token after performing various checks such as ensuring the presence of a token, checking if
-        the token has been revoked, and verifying if the token has expired.
+        the token has been revoked, and verifying if the token has expired. When both the revocation
+        key and the JWKS have to come from Redis they are read in one pipelined round-trip.
         
         .-.-.-.
         
@@ -251,10 +425,24 @@ class Auth:
         if self.token.startswith("Bearer "):
             self.token = self.token.replace("Bearer ", "").strip()
 
-        if self.is_token_revoked():
+        token_hash = self.get_token_hash()
+        if self.revocation_filter is not None and not self.revocation_filter.might_contain(token_hash):
+            revoked = False
+        elif self._jwks_cached():
+            revoked = await self.is_token_revoked()
+        else:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.exists(f"revoked_token:{token_hash}")
+            pipe.get(f"jwks:{self.auth0_domain}")
+            exists, stored = pipe.execute()
+            revoked = bool(exists)
+            if stored and not revoked:
+                self._set_jwks(orjson.loads(stored))
+
+        if revoked:
             raise HTTPException(status_code=401, detail="Token has been revoked")
 
-        self.payload = self.decode_jwt()
+        self.payload = await self.decode_jwt()
         exp = self.payload.get("exp", 0)
         
 
@@ -271,20 +459,48 @@ class Auth:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         
         
         @ returns The `get_auth0_management_token` method returns the Auth0 management token as a
-        string.
+        string. The token is served from the process cache, then from Redis, and is only fetched from
+        Auth0 once it expires there; one worker fetches it while the others wait for it in Redis.
         
         .-.-.-.
         
         
         """
-        if not self.auth0_mgmt_token or self.auth0_mgmt_token_expiry < time.time():
+        if self.auth0_mgmt_token and self.auth0_mgmt_token_expiry > time.time():
+            return self.auth0_mgmt_token
+
+        cached = _MGMT_TOKEN_CACHE.get(self.auth0_domain)
+        if cached and cached[0] > time.time():
+            self.auth0_mgmt_token_expiry, self.auth0_mgmt_token = cached
+            return self.auth0_mgmt_token
+
+        cache_key = f"auth0:mgmt_token:{self.auth0_domain}"
+        lock_key = f"{cache_key}:lock"
+        locked = False
+        try:
+            stored = self._get_mgmt_token(cache_key)
+            if stored:
+                return stored
+            # only one worker fetches a new token; the others wait for it to show up in Redis
+            locked = bool(self.redis_client.set(lock_key, 1, nx=True, ex=MGMT_TOKEN_LOCK_TTL))
+            if not locked:
+                deadline = time.time() + MGMT_TOKEN_WAIT
+                while time.time() < deadline:
+                    await asyncio.sleep(MGMT_TOKEN_POLL_INTERVAL)
+                    stored = self._get_mgmt_token(cache_key)
+                    if stored:
+                        return stored
+        except Exception as e:
+            print(f"Failed to read Auth0 management token from cache: {str(e)}")
+
+        try:
             url = f"https://{self.auth0_domain}/oauth/token"
             data = {
                 "client_id": self.auth0_mgmt_client_id,
@@ -293,12 +509,24 @@ class Auth:
                 "grant_type": "client_credentials"
             }
 
-            resp = httpx.post(url, json=data)
+            resp = await self.http_request("POST", url, json=data)
             if resp.status_code != 200:
                 raise Exception("Failed to retrieve Auth0 management token")
 
-            token_data = resp.json()
+            token_data = orjson.loads(resp.content)
+            ttl = max(int(token_data["expires_in"]) - 60, 1)
             self.auth0_mgmt_token = token_data["access_token"]
-            self.auth0_mgmt_token_expiry = time.time() + token_data["expires_in"] - 60
+            self.auth0_mgmt_token_expiry = time.time() + ttl
+            _MGMT_TOKEN_CACHE[self.auth0_domain] = (self.auth0_mgmt_token_expiry, self.auth0_mgmt_token)
+            try:
+                self.redis_client.setex(cache_key, ttl, self.auth0_mgmt_token)
+            except Exception as e:
+                print(f"Failed to cache Auth0 management token: {str(e)}")
+        finally:
+            if locked:
+                try:
+                    self.redis_client.delete(lock_key)
+                except Exception as e:
+                    print(f"Failed to release Auth0 management token lock: {str(e)}")
 
         return self.auth0_mgmt_token
\ No newline at end of file
@@ -1,90 +1,124 @@
+import logging
+
 import chromadb
-from typing import Any, List, Optional, Dict
+import numpy as np
+from collections import OrderedDict
+from typing import Any, List, Optional, Dict, Sequence, Union
+from urllib.parse import urlsplit
+
+COLLECTION_CACHE_SIZE = 64
+ADD_BATCH_SIZE = 128
+
+logger = logging.getLogger(__name__)
+
+Embedding = Union[List[float], np.ndarray]
 
 
 class CromaDBClient:
     def __init__(self, env: Dict[str, Any]):
 
-        if env["CROMA_API_URL"].contains(":"):
-            host, port = env["CROMA_API_URL"].split(":")
-            self.client = chromadb.HttpClient(
-                ssl=True,
-                host=host,
-                port=port,
-                tenant=env["CROMA_TENANT"],
-                database=env["CROMA_DATABASE"],
-                headers={
-                    "x-chroma-token": env["CROMA_TOKEN"]
-                }
-            )
-        else: 
-            self.client = chromadb.HttpClient(
-                ssl=True,
-                host=env["CROMA_API_URL"],
-                tenant=env["CROMA_TENANT"],
-                database=env["CROMA_DATABASE"],
-                headers={
-                    "x-chroma-token": env["CROMA_TOKEN"]
-                }
-            )
+        # CROMA_API_URL may be a bare host, host:port, or a full URL; the client is built once at
+        # startup and kept on app.state, so this is the only place it is parsed
+        url = env["CROMA_API_URL"]
+        parsed = urlsplit(url if "://" in url else f"https://{url}")
+        self.client = chromadb.HttpClient(
+            ssl=parsed.scheme != "http",
+            host=parsed.hostname or url,
+            port=parsed.port or (80 if parsed.scheme == "http" else 443),
+            tenant=env["CROMA_TENANT"],
+            database=env["CROMA_DATABASE"],
+            headers={
+                "x-chroma-token": env["CROMA_TOKEN"]
+            }
+        )
+
+        # collection handles by name, least recently used first
+        self.collections: OrderedDict[str, Any] = OrderedDict()
+
+    def _collection(self, name: str) -> Any:
+        collection = self.collections.get(name)
+        if collection is None:
+            collection = self.client.get_collection(name=name)
+            self.collections[name] = collection
+            if len(self.collections) > COLLECTION_CACHE_SIZE:
+                self.collections.popitem(last=False)
+        else:
+            self.collections.move_to_end(name)
+        return collection
   
     def create_collection(self, name: str) -> bool:
         try:
-            self.client.create_collection(name=name)
+            self.collections[name] = self.client.create_collection(name=name)
             return True
-        except Exception as e:
-            print(f"Error creating collection: {str(e)}")
+        except Exception:
+            logger.exception("Error creating collection %s", name)
             return False
 
     def get_collection(self, name: str) -> Optional[Any]:
         try:
-            return self.client.get_collection(name=name)
-        except Exception as e:
-            print(f"Error retrieving collection: {str(e)}")
+            return self._collection(name)
+        except Exception:
+            logger.exception("Error retrieving collection %s", name)
             return None
 
-    def add_document(self, collection_name: str, uri: str, embeddings: List[float], hash: str) -> bool:
+    def add_document(self, collection_name: str, uri: str, embeddings: Embedding, hash: str) -> bool:
+        try:
+            collection = self._collection(collection_name)
+            vector = np.asarray(embeddings, dtype=np.float32).reshape(1, -1)
+            collection.add(ids=[hash], uris=[uri], embeddings=vector, metadatas=[{}])
+            return True
+        except Exception:
+            logger.exception("Error adding document to collection %s", collection_name)
+            return False
+
+    def add_documents_batch(self, collection_name: str, ids: List[str], uris: List[str], embeddings: Sequence[Embedding], metadatas: List[Dict[str, Any]]) -> bool:
+        # one request per ADD_BATCH_SIZE documents instead of one per document, with the vectors packed
+        # into a single contiguous float32 matrix rather than lists of boxed floats
         try:
-            collection = self.client.get_collection(name=collection_name)
-            collection.add(ids=[hash], uris=[uri], embeddings=embeddings, metadatas=[{}])
+            collection = self._collection(collection_name)
+            vectors = np.ascontiguousarray(np.stack([np.asarray(e, dtype=np.float32) for e in embeddings]), dtype=np.float32)
+            for start in range(0, len(ids), ADD_BATCH_SIZE):
+                end = start + ADD_BATCH_SIZE
+                collection.add(ids=ids[start:end], uris=uris[start:end], embeddings=vectors[start:end], metadatas=metadatas[start:end])
             return True
-        except Exception as e:
-            print(f"Error adding document to collection {collection_name}: {str(e)}")
+        except Exception:
+            logger.exception("Error adding documents to collection %s", collection_name)
             return False
 
     def get_document(self, collection_name: str, document_id: str) -> Optional[str]:
         try:
-            collection = self.client.get_collection(name=collection_name)
+            collection = self._collection(collection_name)
             result = collection.get(ids=[document_id])
             if result and isinstance(result, dict) and 'documents' in result and result['documents']:
                 return result['documents'][0]
             return None
-        except Exception as e:
-            print(f"Error retrieving document {document_id} from collection {collection_name}: {str(e)}")
+        except Exception:
+            logger.exception("Error retrieving document %s from collection %s", document_id, collection_name)
             return None
 
     def delete_document(self, collection_name: str, document_id: str) -> bool:
         try:
-            collection = self.client.get_collection(name=collection_name)
+            collection = self._collection(collection_name)
             collection.delete(ids=[document_id])
             return True
-        except Exception as e:
-            print(f"Error deleting document {document_id} from collection {collection_name}: {str(e)}")
+        except Exception:
+            logger.exception("Error deleting document %s from collection %s", document_id, collection_name)
             return False
 
     def list_collections(self) -> List[str]:
         try:
             return [col.name for col in self.client.list_collections()]
-        except Exception as e:
-            print(f"Error listing collections: {str(e)}")
+        except Exception:
+            logger.exception("Error listing collections")
             return []
 
     def delete_collection(self, name: str) -> bool:
         try:
             self.client.delete_collection(name=name)
+            self.collections.pop(name, None)
             return True
-        except Exception as e:
-            print(f"Error deleting collection {name}: {str(e)}")
+        except Exception:
+            logger.exception("Error deleting collection %s", name)
             return False
 
     def close_connection(self) -> None:
@@ -93,20 +127,20 @@ class CromaDBClient:
 
     def update_metadata(self, collection_name: str, document_id: str, metadata: Dict[str, Any]) -> bool:
         try:
-            collection = self.client.get_collection(name=collection_name)
+            collection = self._collection(collection_name)
             collection.update(ids=[document_id], metadatas=[metadata])
             return True
-        except Exception as e:
-            print(f"Error updating metadata for document {document_id} in collection {collection_name}: {str(e)}")
+        except Exception:
+            logger.exception("Error updating metadata for document %s in collection %s", document_id, collection_name)
             return False
         
     def get_metadata(self, collection_name: str, document_id: str) -> Optional[Dict[str, Any]]:
         try:
-            collection = self.client.get_collection(name=collection_name)
+            collection = self._collection(collection_name)
             result = collection.get(ids=[document_id])
             if result and isinstance(result, dict) and 'metadatas' in result and result['metadatas']:
                 return dict(result['metadatas'][0])
             return None
-        except Exception as e:
-            print(f"Error retrieving metadata for document {document_id} from collection {collection_name}: {str(e)}")
+        except Exception:
+            logger.exception("Error retrieving metadata for document %s from collection %s", document_id, collection_name)
             return None
\ No newline at end of file
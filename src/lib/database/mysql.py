@@ -1,17 +1,48 @@
-from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import re
+import weakref
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
 
 import aiomysql
 
+STATEMENT_CACHE_SIZE = 500
+POOL_MINSIZE = 10
+POOL_MAXSIZE = 100
+POOL_RECYCLE = 3600
+WRITE_BATCH_SIZE = 100
+WRITE_BATCH_WINDOW = 0.005
+COALESCE_BATCH_SIZE = 100
+COALESCE_WINDOW = 0.003
+
+_DDL_PATTERN = re.compile(r"\s*(CREATE|ALTER|DROP|RENAME|TRUNCATE)\b", re.IGNORECASE)
+# whitespace runs outside of quoted literals and comments; a line comment is matched with the newline
+# that ends it, so collapsing the whitespace after it cannot pull the next line into the comment
+_WHITESPACE_PATTERN = re.compile(
+    r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|/\*.*?\*/|(?:#|--(?=\s|$))[^\n]*\n?)|\s+",
+    re.DOTALL
+)
+
+
+def _collapse_whitespace(match: "re.Match[str]") -> str:
+    # quoted literals and comments are kept verbatim, any other whitespace run becomes one space
+    return match.group(1) or " "
+
+
+logger = logging.getLogger(__name__)
+
 
 class MySQLClient:
-    def __init__(self, host: str, user: str, password: str, database: str,port: int = 3306) -> None:
+    def __init__(self, host: str, user: str, password: str, database: str,port: int = 3306, statement_cache_size: int = STATEMENT_CACHE_SIZE, minsize: int = POOL_MINSIZE, maxsize: int = POOL_MAXSIZE, pool_recycle: int = POOL_RECYCLE) -> None:
         """
         This Python function initializes connection parameters for a database using aiomysql.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/20/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -46,6 +77,25 @@ class MySQLClient:
         
         .-.-.-.
         
+        @ param statement_cache_size (int) 500 - The number of distinct queries whose prepared text is
+        kept. Set to 0 to prepare every query on each call.
+        
+        .-.-.-.
+        
+        @ param minsize (int) 10 - The number of connections opened when the pool is created and kept
+        open while idle, so the first requests do not pay for the connect and handshake.
+        
+        .-.-.-.
+        
+        @ param maxsize (int) 100 - The most connections the pool will open at once.
+        
+        .-.-.-.
+        
+        @ param pool_recycle (int) 3600 - Connections older than this many seconds are replaced when
+        next acquired, so the server's `wait_timeout` never hands out a dead connection.
+        
+        .-.-.-.
+        
         
         """
 
@@ -54,17 +104,49 @@ class MySQLClient:
         self.password = password
         self.database = database
         self.port = port
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.pool_recycle = pool_recycle
 
         self.pool: Optional[aiomysql.Pool] = None
 
+        # query -> (compacted query, is DDL), least recently used first. aiomysql (like PyMySQL) only
+        # implements the text protocol - there is no COM_STMT_PREPARE/EXECUTE or binary binding to reuse
+        # a server-side plan with - so what can be cached client side is the prepared query text.
+        self.statement_cache_size = statement_cache_size
+        self.statement_cache: OrderedDict[str, Tuple[str, bool]] = OrderedDict()
+
+        # queued (query, params, future) writes for batch_commit, flushed by write_batcher
+        self.write_queue: Optional[asyncio.Queue[Tuple[str, Optional[Tuple[Any, ...]], asyncio.Future[bool]]]] = None
+        self.write_batcher: Optional[asyncio.Task[None]] = None
+        self.heartbeat: Optional[asyncio.Task[None]] = None
+
+        # (template, column) -> lookups waiting to be folded into one IN query by coalesced_fetch
+        self.coalesce_batches: Dict[Tuple[str, str], List[Tuple[Any, asyncio.Future[List[Dict[str, Any]]]]]] = {}
+        self.coalesce_tasks: Set[asyncio.Task[None]] = set()
+
+        # a pool belongs to the event loop and sockets of the process that opened it, so a forked worker
+        # must open its own instead of sharing the parent's connections
+        client_ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: (client := client_ref()) and client._fork_safe_reinit())
+
+    def _fork_safe_reinit(self) -> None:
+        self.pool = None
+        self.heartbeat = None
+        self.write_batcher = None
+        self.write_queue = None
+        self.coalesce_batches = {}
+        self.coalesce_tasks = set()
+
     async def connect(self) -> None:
         """
         The `connect` function establishes a MySQL connection pool using aiomysql in Python asyncio.
+        `minsize` connections are opened before it returns, and a heartbeat task keeps idle ones alive.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/20/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -78,13 +160,19 @@ class MySQLClient:
                     password=self.password,
                     db=self.database,
                     port=self.port,
+                    minsize=self.minsize,
+                    maxsize=self.maxsize,
+                    pool_recycle=self.pool_recycle,
                     autocommit=True,
                     cursorclass=aiomysql.cursors.DictCursor
                 )
-                print("MySQL connection pool established successfully.")
-            except aiomysql.Error as e:
-                print(f"MySQL connection error: {str(e)}")
+                logger.info("MySQL connection pool established successfully")
+            except aiomysql.Error:
+                logger.exception("MySQL connection error")
                 self.pool = None
+                return
+        if self.heartbeat is None or self.heartbeat.done():
+            self.heartbeat = asyncio.create_task(self._run_heartbeat())
 
 
     def is_connected(self) -> bool:
@@ -109,6 +197,46 @@ class MySQLClient:
         """
         return self.pool is not None
 
+    def prepare_statement(self, query: str) -> Tuple[str, bool]:
+        """
+        The function `prepare_statement` returns the compacted text of a query and whether it is a DDL
+        statement, caching the result so repeated queries skip the work.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param query (str)  - The parameterized SQL query, with `%s` placeholders.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns A tuple of the query with whitespace outside quoted literals collapsed, and `True` if
+        the query changes the schema.
+        
+        .-.-.-.
+        
+        
+        """
+        cached = self.statement_cache.get(query)
+        if cached is not None:
+            self.statement_cache.move_to_end(query)
+            return cached
+
+        prepared = (
+            _WHITESPACE_PATTERN.sub(_collapse_whitespace, query).strip(),
+            _DDL_PATTERN.match(query) is not None
+        )
+        if self.statement_cache_size > 0:
+            self.statement_cache[query] = prepared
+            if len(self.statement_cache) > self.statement_cache_size:
+                self.statement_cache.popitem(last=False)
+        return prepared
+
     async def execute_query(self, query: str, params: Optional[Tuple[Any, ...]] = None ) -> List[Dict[str, Any]]:
         """
         This Python async function executes a query using aiomysql, handling connection, execution, and
@@ -149,16 +277,140 @@ class MySQLClient:
         if not self.pool:
             return []
 
+        statement, is_ddl = self.prepare_statement(query)
         try:
             async with self.pool.acquire() as conn:
                 async with conn.cursor() as cursor:
-                    await cursor.execute(query, params)
+                    await cursor.execute(statement, params)
+                    if is_ddl:
+                        self.statement_cache.clear()
                     results = await cursor.fetchall()
                     return results if results else []
-        except aiomysql.Error as e:
-            print(f"MySQL query error: {str(e)}")
+        except aiomysql.Error:
+            logger.exception("MySQL query error")
             return []
 
+    async def iter_query(self, query: str, params: Optional[Tuple[Any, ...]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        The function `iter_query` executes a query with an unbuffered server-side cursor and yields the
+        rows as they arrive, so large results are never held in memory all at once.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param query (str)  - The parameterized SQL query, with `%s` placeholders.
+        
+        .-.-.-.
+        
+        @ param params (Optional[Tuple[Any, ...]])  - The parameters for the query.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns An async iterator over the result rows as dictionaries. The connection stays checked
+        out until the iteration finishes, so results should be consumed promptly. If there is an error,
+        it is logged and the iteration stops.
+        
+        .-.-.-.
+        
+        
+        """
+        if not self.is_connected():
+            await self.connect()
+        if not self.pool:
+            return
+
+        statement, _ = self.prepare_statement(query)
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.cursor(aiomysql.cursors.SSDictCursor) as cursor:
+                    await cursor.execute(statement, params)
+                    while True:
+                        row = await cursor.fetchone()
+                        if row is None:
+                            break
+                        yield row
+        except aiomysql.Error:
+            logger.exception("MySQL query error")
+
+    async def coalesced_fetch(self, template: str, where_col: str, value: Any) -> List[Dict[str, Any]]:
+        """
+        The function `coalesced_fetch` looks up the rows where `where_col` equals `value`. Lookups for
+        the same template that arrive within a few milliseconds of each other are run as one
+        `where_col IN (...)` query and the rows are handed back to each caller.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param template (str)  - A query with a single `where_col = %s` condition and no other
+        placeholders, e.g. `SELECT * FROM chunks WHERE id = %s`. The selected columns must include
+        `where_col`.
+        
+        .-.-.-.
+        
+        @ param where_col (str)  - The column compared against `value`.
+        
+        .-.-.-.
+        
+        @ param value ()  - The value to look up.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The rows whose `where_col` equals `value`, or an empty list if there are none or the
+        shared query failed.
+        
+        .-.-.-.
+        
+        
+        """
+        key = (template, where_col)
+        future: asyncio.Future[List[Dict[str, Any]]] = asyncio.get_running_loop().create_future()
+        batch = self.coalesce_batches.get(key)
+        if batch is None:
+            batch = self.coalesce_batches[key] = []
+            task = asyncio.create_task(self._run_coalesced(key, batch))
+            self.coalesce_tasks.add(task)
+            task.add_done_callback(self.coalesce_tasks.discard)
+        batch.append((value, future))
+        if len(batch) >= COALESCE_BATCH_SIZE:
+            # a full batch stops taking lookups; the next one starts a new batch
+            self.coalesce_batches.pop(key, None)
+        return await future
+
+    async def _run_coalesced(self, key: Tuple[str, str], batch: List[Tuple[Any, "asyncio.Future[List[Dict[str, Any]]]"]]) -> None:
+        await asyncio.sleep(COALESCE_WINDOW)
+        if self.coalesce_batches.get(key) is batch:
+            del self.coalesce_batches[key]
+        await self._fetch_coalesced(key[0], key[1], batch)
+
+    async def _fetch_coalesced(self, template: str, where_col: str, batch: List[Tuple[Any, "asyncio.Future[List[Dict[str, Any]]]"]]) -> None:
+        rows_by_value: Dict[Any, List[Dict[str, Any]]] = {}
+        try:
+            values = list(dict.fromkeys(value for value, _ in batch))
+            condition = re.compile(rf"\b{re.escape(where_col)}\s*=\s*%s")
+            query, count = condition.subn(f"{where_col} IN ({', '.join(['%s'] * len(values))})", template, count=1)
+            if count != 1:
+                raise ValueError(f"Template has no '{where_col} = %s' condition")
+            for row in await self.execute_query(query, tuple(values)):
+                rows_by_value.setdefault(row.get(where_col), []).append(row)
+        except Exception:
+            logger.exception("MySQL coalesced fetch error")
+        finally:
+            for value, future in batch:
+                if not future.done():
+                    future.set_result(rows_by_value.get(value, []))
+
     async def execute_commit(self, query: str, params: Optional[Tuple[Any, ...]] = None) -> bool:
         """
         This function executes a SQL query with optional parameters and commits the transaction in an
@@ -198,26 +450,163 @@ class MySQLClient:
         if not self.pool:
             return False
 
+        statement, is_ddl = self.prepare_statement(query)
         try:
             async with self.pool.acquire() as conn:
                 async with conn.cursor() as cursor:
-                    await cursor.execute(query, params)
+                    await cursor.execute(statement, params)
+                    if is_ddl:
+                        self.statement_cache.clear()
                     # autocommit=True (set in pool) typically handles commits, this is redundant for now may remove later (conn.commit())
                     await conn.commit()
                     return True
-        except aiomysql.Error as e:
-            print(f"MySQL commit error: {str(e)}")
+        except aiomysql.Error:
+            logger.exception("MySQL commit error")
+            return False
+
+    async def execute_many(self, query: str, seq_params: Sequence[Tuple[Any, ...]]) -> bool:
+        """
+        The function `execute_many` runs one query for every set of parameters on a single connection.
+        aiomysql rewrites a plain `INSERT ... VALUES` into one multi-row insert, so bulk inserts cost a
+        single round-trip.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param query (str)  - The parameterized SQL query, with `%s` placeholders.
+        
+        .-.-.-.
+        
+        @ param seq_params (Sequence[Tuple[Any, ...]])  - One tuple of parameters per row.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `execute_many` method returns `True` if every row was written, and `False` if
+        there was an error.
+        
+        .-.-.-.
+        
+        
+        """
+        if not seq_params:
+            return True
+        if not self.is_connected():
+            await self.connect()
+        if not self.pool:
+            return False
+
+        statement, is_ddl = self.prepare_statement(query)
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.executemany(statement, seq_params)
+                    if is_ddl:
+                        self.statement_cache.clear()
+                    return True
+        except aiomysql.Error:
+            logger.exception("MySQL executemany error")
+            return False
+
+    async def batch_commit(self, query: str, params: Optional[Tuple[Any, ...]] = None) -> bool:
+        """
+        The function `batch_commit` queues a write and waits for it to be committed. Writes queued
+        within a few milliseconds of each other are committed together in one transaction on one
+        connection, instead of one round-trip and commit each.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param query (str)  - The parameterized SQL query, with `%s` placeholders.
+        
+        .-.-.-.
+        
+        @ param params (Optional[Tuple[Any, ...]])  - The parameters for the query.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `batch_commit` method returns `True` once the batch holding the write has been
+        committed, and `False` if that batch was rolled back.
+        
+        .-.-.-.
+        
+        
+        """
+        if self.write_queue is None:
+            self.write_queue = asyncio.Queue()
+        if self.write_batcher is None or self.write_batcher.done():
+            self.write_batcher = asyncio.create_task(self._run_write_batcher(self.write_queue))
+
+        future: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+        await self.write_queue.put((query, params, future))
+        return await future
+
+    async def _run_write_batcher(self, queue: "asyncio.Queue[Tuple[str, Optional[Tuple[Any, ...]], asyncio.Future[bool]]]") -> None:
+        while True:
+            batch = [await queue.get()]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + WRITE_BATCH_WINDOW
+            while len(batch) < WRITE_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            success = False
+            try:
+                success = await self._commit_batch(batch)
+            finally:
+                # also reached on cancellation, so no caller is left waiting on a batch that never ran
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_result(success)
+
+    async def _commit_batch(self, batch: List[Tuple[str, Optional[Tuple[Any, ...]], "asyncio.Future[bool]"]]) -> bool:
+        if not self.is_connected():
+            await self.connect()
+        if not self.pool:
+            return False
+
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.begin()
+                try:
+                    async with conn.cursor() as cursor:
+                        for query, params, _ in batch:
+                            statement, _ = self.prepare_statement(query)
+                            await cursor.execute(statement, params)
+                    await conn.commit()
+                    return True
+                except aiomysql.Error:
+                    await conn.rollback()
+                    raise
+        except aiomysql.Error:
+            logger.exception("MySQL batch commit error")
             return False
 
     async def keep_alive(self) -> None:
         """
-        The `keep_alive` function checks and maintains the MySQL connection status in an asynchronous
-        Python program.
+        The `keep_alive` function pings every idle connection in the pool with the protocol-level
+        `COM_PING`, reconnecting any that the server has dropped.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -235,16 +624,20 @@ class MySQLClient:
         if not self.pool:
             return
 
+        # the pool hands out idle connections from the front and returns them to the back, so
+        # acquiring freesize times in a row visits each idle connection once
         try:
-            async with self.pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    await cursor.execute("SELECT 1")
-                    await cursor.fetchone()
-            print("MySQL connection is alive.")
-        except aiomysql.Error as e:
-            print(f"MySQL connection error: {str(e)}")
-            self.pool = None
-            await self.connect()
+            for _ in range(self.pool.freesize):
+                async with self.pool.acquire() as conn:
+                    await conn.ping(reconnect=True)
+        except aiomysql.Error:
+            logger.exception("MySQL connection error")
+
+    async def _run_heartbeat(self) -> None:
+        interval = max(self.pool_recycle // 2, 1)
+        while True:
+            await asyncio.sleep(interval)
+            await self.keep_alive()
 
     async def close(self) -> None:
         """
@@ -259,8 +652,18 @@ class MySQLClient:
         
         
         """
+        if self.heartbeat is not None:
+            self.heartbeat.cancel()
+            self.heartbeat = None
+        if self.write_batcher is not None:
+            self.write_batcher.cancel()
+            self.write_batcher = None
+        while self.write_queue is not None and not self.write_queue.empty():
+            _, _, future = self.write_queue.get_nowait()
+            if not future.done():
+                future.set_result(False)
         if self.pool:
             self.pool.close()
             await self.pool.wait_closed()
             self.pool = None
-            print("MySQL connection pool closed.")
+            logger.info("MySQL connection pool closed")
@@ -1,35 +1,117 @@
-import json
-from typing import Any, Optional
+import logging
+import socket
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+import orjson
 import redis
+import redis.asyncio
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = 64
+# longest a caller waits for a free pooled connection before the command fails
+POOL_TIMEOUT = 5
+LOCAL_CACHE_SIZE = 10_000
+JSON_PREFIXES = ("{", "[", b"{", b"[")
+# first characters of the JSON scalars (numbers, strings, true, false, null); only values starting with
+# one of these are worth a parse attempt, the rest are returned as stored
+JSON_SCALAR_PREFIXES = frozenset(
+    prefix for char in '-0123456789"tfn' for prefix in (char, char.encode())
+)
+
+# returns the stored value, or stores ARGV[1] (with an optional ttl in ARGV[2]) if the key is missing
+GET_OR_SET_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    return value
+end
+if tonumber(ARGV[2]) > 0 then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2], 'NX')
+else
+    redis.call('SET', KEYS[1], ARGV[1], 'NX')
+end
+return ARGV[1]
+"""
 
 
 # The `RedisClient` class provides methods for interacting with a Redis database, including setting
 # and getting values, deleting keys, checking key existence, incrementing keys, and closing the
 # connection.
 class RedisClient:
-    def __init__(self, host: str, port: int, db: int = 0, decode_responses: bool = True):
+    def __init__(self, host: str, port: int, db: int = 0, decode_responses: bool = True, unix_socket_path: Optional[str] = None, max_connections: int = MAX_CONNECTIONS, local_cache_ttl: float = 0):
         self.host = host
         self.port = port
         self.db = db
         self.decode_responses = decode_responses
 
-        self.client: redis.Redis = redis.StrictRedis(
-            host=self.host,
-            port=self.port,
-            db=self.db,
-            decode_responses=self.decode_responses
+        # a server given by its unix socket is reached over it, which skips the TCP stack entirely;
+        # otherwise the host and port get pooled TCP connections with keepalive. The socket is never
+        # guessed from a local host, which could be a different server than the one on the port.
+        self.unix_socket_path = unix_socket_path
+
+        # blocking pools: once max_connections are in use, callers wait up to POOL_TIMEOUT for one to be
+        # released, where the default pool raises at once and every wrapper would report a miss
+        connection_kwargs: Dict[str, Any] = {
+            "db": self.db,
+            "max_connections": max_connections,
+            "timeout": POOL_TIMEOUT
+        }
+        if self.unix_socket_path:
+            connection_kwargs["path"] = self.unix_socket_path
+            async_connection_class: Any = redis.asyncio.UnixDomainSocketConnection
+            sync_connection_class: Any = redis.UnixDomainSocketConnection
+        else:
+            connection_kwargs.update(
+                host=self.host,
+                port=self.port,
+                socket_keepalive=True,
+                socket_keepalive_options={socket.TCP_KEEPIDLE: 30} if hasattr(socket, "TCP_KEEPIDLE") else None
+            )
+            async_connection_class = redis.asyncio.Connection
+            sync_connection_class = redis.Connection
+
+        # the request path goes through the async client so a round-trip never blocks the event loop;
+        # the sync client is kept for code that runs off the loop (pub/sub threads, S3Pool, Auth)
+        self.client: redis.asyncio.Redis = redis.asyncio.Redis.from_pool(redis.asyncio.BlockingConnectionPool(
+            connection_class=async_connection_class, decode_responses=self.decode_responses, **connection_kwargs
+        ))
+        self.sync_client: redis.Redis = redis.StrictRedis(connection_pool=redis.BlockingConnectionPool(
+            connection_class=sync_connection_class, decode_responses=self.decode_responses, **connection_kwargs
+        ))
+        # binary values such as embedding vectors have to come back undecoded
+        self.bytes_client: redis.asyncio.Redis = (
+            redis.asyncio.Redis.from_pool(redis.asyncio.BlockingConnectionPool(
+                connection_class=async_connection_class, decode_responses=False, **connection_kwargs
+            ))
+            if self.decode_responses else self.client
+        )
+
+        # raw values of recently read keys, so hot keys skip the round-trip. Writes through this client
+        # invalidate their keys, but writes from other processes are only seen once an entry expires, so
+        # it is off unless a ttl is given. The raw value is kept and decoded on every hit, so callers
+        # that modify the returned object never change the cached copy.
+        self.local_cache: Optional[TTLCache[str, Any]] = (
+            TTLCache(maxsize=LOCAL_CACHE_SIZE, ttl=local_cache_ttl) if local_cache_ttl > 0 else None
         )
 
-    def set_value(self, key: str, value: Any, expire_time: Optional[int] = None) -> bool:
+        # sent once and then run by sha; redis-py reloads it if the server answers NOSCRIPT
+        self.get_or_set_script = self.client.register_script(GET_OR_SET_SCRIPT)
+
+    def _invalidate(self, *keys: str) -> None:
+        if self.local_cache is not None:
+            for key in keys:
+                self.local_cache.pop(key, None)
+
+    async def set_value(self, key: str, value: Any, expire_time: Optional[int] = None) -> bool:
         """
         The function `set_value` sets a key-value pair in Redis with an optional expiration time,
-        converting the value to JSON if it is a dictionary or list.
+        converting the value to JSON with `orjson` if it is a dictionary or list.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/14/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -63,22 +145,86 @@ class RedisClient:
         """
         try:
             if isinstance(value, (dict, list)):
-                value = json.dumps(value)  # Convert to JSON if necessary
-            self.client.set(key, value, ex=expire_time)
+                value = orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)  # Convert to JSON if necessary
+            self._invalidate(key)
+            await self.client.set(key, value, ex=expire_time)
             return True
-        except Exception as e:
-            print(f"Error setting value in Redis: {str(e)}")
+        except Exception:
+            logger.exception("Error setting value in Redis")
             return False
 
-    def get_value(self, key: str) -> Any:
+    async def set_many(self, items: Iterable[Tuple[str, Any, Optional[int]]]) -> bool:
+        """
+        The function `set_many` sets several key-value pairs in Redis in a single pipelined round-trip,
+        converting values to JSON the same way `set_value` does.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param items (Iterable[Tuple[str, Any, Optional[int]]])  - The `(key, value, expire_time)`
+        entries to write. `expire_time` is in seconds, or `None` for keys that should not expire.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `set_many` method returns `True` if every value was written, and `False` if there
+        was an error sending the pipeline.
+        
+        .-.-.-.
+        
+        
+        """
+        try:
+            async with self.pipeline() as pipe:
+                for key, value, expire_time in items:
+                    self._invalidate(key)
+                    if isinstance(value, (dict, list)):
+                        value = orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+                    pipe.set(key, value, ex=expire_time)
+                await pipe.execute()
+            return True
+        except Exception:
+            logger.exception("Error setting values in Redis")
+            return False
+
+    def pipeline(self) -> Any:
+        """
+        The function `pipeline` returns a non-transactional pipeline on the underlying client, so several
+        commands can be queued and sent to Redis in one round-trip.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        
+        
+        @ returns A `redis.asyncio` pipeline that can be used as an async context manager; queued
+        commands are sent when `execute` is awaited.
+        
+        .-.-.-.
+        
+        
+        """
+        return self.client.pipeline(transaction=False)
+
+    async def get_value(self, key: str) -> Any:
         """
         The function `get_value` retrieves a value from a Redis client by a given key, handling JSON
-        decoding errors and exceptions.
+        decoding errors and exceptions. When the local cache is enabled, recently read keys are served
+        from it without a round-trip.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/14/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -90,8 +236,8 @@ class RedisClient:
         
         
         @ returns The `get_value` method returns the value associated with the given key from a Redis
-        client. If the value is a JSON string, it is converted back to a Python object using
-        `json.loads`. If the value is not a valid JSON string, the original value is returned. If an
+        client. If the value is a JSON object or array, it is converted back to a Python object using
+        `orjson.loads`. Any other value is returned as stored. If an
         error occurs during the process, the method prints an error message and returns `None`.
         
         .-.-.-.
@@ -99,19 +245,120 @@ class RedisClient:
         
         """
         try:
-            value = self.client.get(key)
-            if value:
-                try:
-                    if isinstance(value, (str, bytes, bytearray)):
-                        return json.loads(value)  # Convert JSON strings back to Python objects
-                except json.JSONDecodeError:
-                    return value
+            if self.local_cache is not None and key in self.local_cache:
+                return self._decode(self.local_cache[key])
+            value = await self.client.get(key)
+            if self.local_cache is not None and value is not None:
+                self.local_cache[key] = value
+            return self._decode(value)
+        except Exception:
+            logger.exception("Error getting value from Redis")
+            return None
+
+    async def get_or_set(self, key: str, value: Any, expire_time: Optional[int] = None) -> Any:
+        """
+        The function `get_or_set` returns the value stored at `key`, storing `value` first if the key
+        is missing, in a single round-trip. Only the first of several concurrent callers gets to store
+        its value; the others all receive that value.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param key (str)  - The key to read, or to store `value` under.
+        
+        .-.-.-.
+        
+        @ param value ()  - The value to store if the key is missing, converted to JSON the same way
+        `set_value` does.
+        
+        .-.-.-.
+        
+        @ param expire_time (int)  - The expiration time in seconds for a newly stored value, or `None`
+        for no expiration.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `get_or_set` method returns the stored value, decoded the same way `get_value`
+        does, or `None` if there was an error.
+        
+        .-.-.-.
+        
+        
+        """
+        try:
+            if isinstance(value, (dict, list)):
+                value = orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+            self._invalidate(key)
+            stored = await self.get_or_set_script(keys=[key], args=[value, expire_time or 0])
+            return self._decode(stored)
+        except Exception:
+            logger.exception("Error getting or setting key %s", key)
             return None
-        except Exception as e:
-            print(f"Error getting value from Redis: {str(e)}")
+
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        """
+        The function `get_many` retrieves several values from Redis in one `MGET` round-trip, decoding
+        each the same way `get_value` does.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param keys (List[str])  - The keys to retrieve.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `get_many` method returns the values in the same order as `keys`, with `None` for
+        missing keys. If an error occurs, every value is `None`.
+        
+        .-.-.-.
+        
+        
+        """
+        if not keys:
+            return []
+        try:
+            if self.local_cache is None:
+                return [self._decode(value) for value in await self.client.mget(keys)]
+
+            cache = self.local_cache
+            missing = [key for key in keys if key not in cache]
+            fetched = dict(zip(missing, await self.client.mget(missing))) if missing else {}
+            for key, value in fetched.items():
+                if value is not None:
+                    cache[key] = value
+            return [self._decode(fetched[key] if key in fetched else cache.get(key)) for key in keys]
+        except Exception:
+            logger.exception("Error getting values from Redis")
+            return [None] * len(keys)
+
+    @staticmethod
+    def _decode(value: Any) -> Any:
+        if not value:
             return None
+        # dicts and lists always parse; a value that could be a JSON scalar is parsed as well, so numbers,
+        # booleans and quoted strings come back decoded, and if it fails to parse it is returned as stored.
+        # Anything else is returned as stored without paying for a failed parse.
+        prefix = value[:1]
+        if prefix in JSON_PREFIXES or prefix in JSON_SCALAR_PREFIXES:
+            try:
+                return orjson.loads(value)  # Convert JSON strings back to Python objects
+            except orjson.JSONDecodeError:
+                pass
+        return value
 
-    def delete_key(self, key: str) -> bool:
+    async def delete_key(self, key: str) -> bool:
         """
         The function `delete_key` attempts to delete a key from a client object and handles any
         exceptions that may occur during the process.
@@ -119,7 +366,7 @@ class RedisClient:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/14/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -142,11 +389,44 @@ class RedisClient:
         
         """
         try:
-            return bool(self.client.delete(key))
-        except Exception as e:
-            print(f"Error deleting key {key}: {str(e)}")
+            self._invalidate(key)
+            return bool(await self.client.delete(key))
+        except Exception:
+            logger.exception("Error deleting key %s", key)
             return False
 
+    async def pop_value(self, key: str) -> Any:
+        """
+        The function `pop_value` reads a key and deletes it in one GETDEL, so of several concurrent
+        callers only one gets the value.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param key (str)  - The key to read and delete.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The value the key held, decoded as by `get_value`, or `None` if it was missing or an
+        error occurred.
+        
+        .-.-.-.
+        
+        
+        """
+        try:
+            self._invalidate(key)
+            return self._decode(await self.client.getdel(key))
+        except Exception:
+            logger.exception("Error popping key %s", key)
+            return None
+
     async def key_exists(self, key: str) -> bool:
         """
         The function `key_exists` checks if a key exists in a client and returns a boolean value.
@@ -154,7 +434,7 @@ class RedisClient:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/14/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -176,11 +456,11 @@ class RedisClient:
         try:
             result = await self.client.exists(key)
             return bool(result > 0)
-        except Exception as e:
-            print(f"Error checking if key exists: {str(e)}")
+        except Exception:
+            logger.exception("Error checking if key exists")
             return False
 
-    def increment_key(self, key: str, amount: int = 1) -> Optional[int]:
+    async def increment_key(self, key: str, amount: int = 1) -> Optional[int]:
         """
         This Python function increments the value of a key in a client object by a specified amount,
         handling exceptions and returning the result or printing an error message.
@@ -188,7 +468,7 @@ class RedisClient:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/14/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -216,13 +496,14 @@ class RedisClient:
         
         """
         try:
-            result = self.client.incr(key, amount)
-            return int(str(result)) if result is not None else None
-        except Exception as e:
-            print(f"Error incrementing key {key}: {str(e)}")
+            self._invalidate(key)
+            result = await self.client.incr(key, amount)
+            return result if isinstance(result, int) else int(result)
+        except Exception:
+            logger.exception("Error incrementing key %s", key)
             return None
 
-    def close_connection(self) -> None:
+    async def close_connection(self) -> None:
         """
         The `close_connection` function attempts to close a Redis connection and prints an error message if
         an exception occurs.
@@ -230,14 +511,19 @@ class RedisClient:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/14/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         
         """
         try:
-            self.client.close() #type: ignore
-        except Exception as e:
-            print(f"Error closing Redis connection: {str(e)}")
+            await self.client.aclose()
+            if self.bytes_client is not self.client:
+                await self.bytes_client.aclose()
+            self.sync_client.close()
+            # a client given its pool leaves it open on close
+            self.sync_client.connection_pool.disconnect()
+        except Exception:
+            logger.exception("Error closing Redis connection")
 
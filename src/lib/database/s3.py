@@ -1,13 +1,59 @@
+import asyncio
 import io
-from typing import Any, List, Optional
+import itertools
+import logging
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, BinaryIO, Callable, List, Optional, Sequence, TypeVar, Union
 
+import certifi
+import urllib3
 from minio import Minio
+from minio.commonconfig import CopySource
 from minio.datatypes import Bucket
 from minio.error import S3Error
+from urllib3.connection import HTTPConnection
+
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+# parts of one multipart upload sent at once; bounds its memory to this many part buffers
+PARALLEL_PART_UPLOADS = 4
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# objects are stored under their hex hash, so splitting the key space on the first hex digit gives
+# listing shards of roughly equal size
+LIST_SHARD_BOUNDARIES = tuple(f"{i:x}" for i in range(1, 16))
+MAX_POOL_CONNECTIONS = 64
+BUCKET_EXISTS_TTL = 30.0
+MAX_WORKERS = 16
+# a listing may only hold this many of the executor's threads, leaving the rest for uploads
+MAX_LIST_WORKERS = MAX_WORKERS // 4
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class _MemoryviewReader:
+    """Minimal read-only file object over a buffer, so a bytearray or memoryview can be uploaded
+    without first copying all of it into a BytesIO."""
+
+    __slots__ = ("view", "position", "size")
+
+    def __init__(self, buffer: Union[bytearray, memoryview]) -> None:
+        self.view = memoryview(buffer).cast("B")
+        self.position = 0
+        self.size = self.view.nbytes
+
+    def read(self, size: int = -1) -> bytes:
+        start = self.position
+        end = self.size if size < 0 else min(start + size, self.size)
+        self.position = end
+        return self.view[start:end].tobytes()
 
 
 class S3Client:
-    def __init__(self, server_url: str, access_key: str, secret_key: str, verify_ssl: bool = False) -> None:
+    def __init__(self, server_url: str, access_key: str, secret_key: str, verify_ssl: bool = False, max_pool_connections: int = MAX_POOL_CONNECTIONS) -> None:
         """
         The function initializes a Minio client with specified server URL, access key, secret key, and
         SSL verification option.
@@ -15,7 +61,7 @@ class S3Client:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -46,6 +92,12 @@ class S3Client:
         
         .-.-.-.
         
+        @ param max_pool_connections (int) 64 - The number of keep-alive connections kept open to the
+        server. Minio's default pool holds 10, so under concurrent uploads extra connections were
+        opened and thrown away after each request instead of being reused.
+        
+        .-.-.-.
+        
         
         """
 
@@ -54,13 +106,77 @@ class S3Client:
         self.secret_key = secret_key
         self.verify_ssl = verify_ssl
 
+        # One pool per server for the lifetime of the process, so requests reuse warm connections
+        # rather than paying a new TCP (and TLS) handshake each time
+        self.http_client = urllib3.PoolManager(
+            num_pools=1,
+            maxsize=max_pool_connections,
+            timeout=urllib3.Timeout(connect=10.0, read=300.0),
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=certifi.where(),
+            retries=urllib3.Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=[500, 502, 503, 504]
+            ),
+            # keepalive probes stop idle pooled connections being silently dropped by NAT or load
+            # balancers, which would otherwise cost a failed request and a fresh handshake
+            socket_options=HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        )
+
         self.client = Minio(
             endpoint=server_url,
             access_key=access_key,
             secret_key=secret_key,
-            secure=verify_ssl
+            secure=verify_ssl,
+            http_client=self.http_client
         )
 
+        # Minio is blocking, so its calls run on this server's own threads; a slow server then only
+        # holds up its own requests instead of the loop's shared default executor
+        self.executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix=f"s3-{server_url}")
+
+        # bucket name -> monotonic time it was last seen to exist
+        self.known_buckets: dict[str, float] = {}
+
+    async def run(self, method: Callable[..., T], *args: Any) -> T:
+        """
+        The function `run` awaits one of this client's blocking methods on the client's executor, so
+        the event loop keeps serving other requests during the S3 round-trip.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param method (Callable[..., T])  - The method to call, e.g. `client.upload_file`.
+        
+        .-.-.-.
+        
+        @ param args ()  - The positional arguments for `method`.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The value returned by `method`.
+        
+        .-.-.-.
+        
+        
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, method, *args)
+
+    def _bucket_known(self, bucket_name: str) -> bool:
+        seen = self.known_buckets.get(bucket_name)
+        return seen is not None and time.monotonic() - seen < BUCKET_EXISTS_TTL
+
+    def _forget_missing_bucket(self, error: S3Error, bucket_name: str) -> None:
+        if error.code == "NoSuchBucket":
+            self.known_buckets.pop(bucket_name, None)
+
     def list_buckets(self) -> Optional[List[Bucket]]:
         """
         The function `list_buckets` attempts to list buckets using an S3 client and handles errors by
@@ -84,8 +200,8 @@ class S3Client:
         """
         try:
             return self.client.list_buckets()
-        except S3Error as e:
-            print(f"Error listing buckets on {self.server_url}: {e}")
+        except S3Error:
+            logger.exception("Error listing buckets on %s", self.server_url)
             return None
 
     def list_objects(self, bucket_name: str) -> Optional[List[Any]]:
@@ -120,17 +236,81 @@ class S3Client:
             objects = self.client.list_objects(bucket_name, recursive=True)
             return list(objects)
         except S3Error as e:
-            print(f"Error listing objects in bucket {bucket_name}: {e}")
+            self._forget_missing_bucket(e, bucket_name)
+            logger.exception("Error listing objects in bucket %s", bucket_name)
+            return None
+
+    def _list_key_range(self, bucket_name: str, start_after: Optional[str], last_key: Optional[str]) -> List[Any]:
+        # every key k with start_after < k <= last_key, so adjacent ranges neither overlap nor leave gaps
+        objects = []
+        for obj in self.client.list_objects(bucket_name, recursive=True, start_after=start_after):
+            if last_key is not None and obj.object_name > last_key:
+                break
+            objects.append(obj)
+        return objects
+
+    async def list_objects_parallel(self, bucket_name: str, boundaries: Sequence[str] = LIST_SHARD_BOUNDARIES) -> Optional[List[Any]]:
+        """
+        The function `list_objects_parallel` lists every object in a bucket by splitting the key space
+        at `boundaries` and listing each range in its own thread, so a large bucket takes one range's
+        worth of page round-trips instead of all of them.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param bucket_name (str)  - The name of the bucket to list.
+        
+        .-.-.-.
+        
+        @ param boundaries (Sequence[str]) LIST_SHARD_BOUNDARIES - Sorted keys the listing is split at.
+        Keys that fall outside the hex digits, such as `data.json`, are still listed by whichever range
+        they sort into.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The function `list_objects_parallel` returns every object in the bucket in key order,
+        or `None` if any range failed to list.
+        
+        .-.-.-.
+        
+        
+        """
+        edges: List[Optional[str]] = [None, *boundaries, None]
+        slots = asyncio.Semaphore(MAX_LIST_WORKERS)
+
+        async def list_range(start_after: Optional[str], last_key: Optional[str]) -> List[Any]:
+            async with slots:
+                return await self.run(self._list_key_range, bucket_name, start_after, last_key)
+
+        try:
+            shards = await asyncio.gather(*(
+                list_range(start_after, last_key)
+                for start_after, last_key in zip(edges, edges[1:])
+            ))
+            return list(itertools.chain.from_iterable(shards))
+        except S3Error as e:
+            self._forget_missing_bucket(e, bucket_name)
+            logger.exception("Error listing objects in bucket %s", bucket_name)
+            return None
+        except (urllib3.exceptions.HTTPError, OSError):
+            # an unreachable server fails its listing like any other error, so callers can drop it
+            logger.exception("Error listing objects in bucket %s", bucket_name)
             return None
 
-    def upload_file(self, bucket_name: str, file_name: str, file_content: bytes) -> bool:
+    def upload_file(self, bucket_name: str, file_name: str, file_content: Union[bytes, bytearray, memoryview, BinaryIO], length: int = -1, part_size: int = MULTIPART_CHUNK_SIZE) -> bool:
         """
         The `upload_file` function uploads a file to an S3 bucket using the provided file content.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -147,9 +327,21 @@ class S3Client:
         
         .-.-.-.
         
-        @ param file_content (bytes)  - The `file_content` parameter in the `upload_file` function
-        represents the content of the file that you want to upload. It should be provided as a bytes
-        object containing the actual data of the file you wish to upload to the specified S3 bucket.
+        @ param file_content (Union[bytes, bytearray, memoryview, BinaryIO])  - The `file_content`
+        parameter in the `upload_file` function represents the content of the file that you want to
+        upload. It can be a bytes-like object or a binary file object; file objects are streamed to the
+        bucket in `part_size` parts, up to `PARALLEL_PART_UPLOADS` at a time, instead of being read into
+        memory first.
+        
+        .-.-.-.
+        
+        @ param length (int) -1 - The size of a file object in bytes. When it is -1 the size is taken
+        from the stream if it is seekable, otherwise the stream is read to its end as a multipart upload
+        of unknown length.
+        
+        .-.-.-.
+        
+        @ param part_size (int) MULTIPART_CHUNK_SIZE - The size of each part of a multipart upload.
         
         .-.-.-.
         
@@ -163,22 +355,210 @@ class S3Client:
         
         """
         try:
-            data_stream = io.BytesIO(file_content)
-            self.client.put_object(bucket_name, file_name, data_stream, length=len(file_content))
+            if isinstance(file_content, bytes):
+                # BytesIO shares a bytes buffer until it is written to, so wrapping does not copy it
+                self.client.put_object(bucket_name, file_name, io.BytesIO(file_content), length=len(file_content))
+            elif isinstance(file_content, (bytearray, memoryview)):
+                # BytesIO would copy a mutable buffer up front; this reads straight out of it instead
+                reader = _MemoryviewReader(file_content)
+                self.client.put_object(bucket_name, file_name, reader, length=reader.size)
+            else:
+                if length < 0 and file_content.seekable():
+                    file_content.seek(0, io.SEEK_END)
+                    length = file_content.tell()
+                    file_content.seek(0)
+                self.client.put_object(
+                    bucket_name,
+                    file_name,
+                    file_content,
+                    length=length,
+                    part_size=part_size,
+                    num_parallel_uploads=PARALLEL_PART_UPLOADS
+                )
             return True
         except S3Error as e:
-            print(f"Error uploading file {file_name} to bucket {bucket_name}: {e}")
+            self._forget_missing_bucket(e, bucket_name)
+            logger.exception("Error uploading file %s to bucket %s", file_name, bucket_name)
             return False
 
+    def move_file(self, bucket_name: str, source_name: str, file_name: str) -> bool:
+        """
+        The function `move_file` copies an object to a new name server side and removes the original,
+        so staged uploads can be renamed without sending the data again.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param bucket_name (str)  - The name of the bucket holding the object.
+        
+        .-.-.-.
+        
+        @ param source_name (str)  - The current name of the object.
+        
+        .-.-.-.
+        
+        @ param file_name (str)  - The name the object is moved to.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `move_file` method returns `True` if the object was copied and the original
+        removed, and `False` if an error occurred.
+        
+        .-.-.-.
+        
+        
+        """
+        try:
+            self.client.copy_object(bucket_name, file_name, CopySource(bucket_name, source_name))
+            self.client.remove_object(bucket_name, source_name)
+            return True
+        except S3Error as e:
+            self._forget_missing_bucket(e, bucket_name)
+            logger.exception("Error moving %s to %s in bucket %s", source_name, file_name, bucket_name)
+            return False
+
+    def delete_file(self, bucket_name: str, file_name: str) -> bool:
+        """
+        The function `delete_file` removes an object from a bucket.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param bucket_name (str)  - The name of the bucket holding the object.
+        
+        .-.-.-.
+        
+        @ param file_name (str)  - The name of the object to remove.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `delete_file` method returns `True` if the object was removed, and `False` if an
+        error occurred.
+        
+        .-.-.-.
+        
+        
+        """
+        try:
+            self.client.remove_object(bucket_name, file_name)
+            return True
+        except S3Error as e:
+            self._forget_missing_bucket(e, bucket_name)
+            logger.exception("Error deleting file %s from bucket %s", file_name, bucket_name)
+            return False
+
+    def presigned_upload_url(self, bucket_name: str, file_name: str, expires: timedelta = timedelta(hours=1)) -> Optional[str]:
+        """
+        The function `presigned_upload_url` creates a presigned PUT URL so a client can upload an object
+        directly to the server without the bytes passing through the backend.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param bucket_name (str)  - The name of the bucket the object will be uploaded to.
+        
+        .-.-.-.
+        
+        @ param file_name (str)  - The name of the object the URL allows the client to write.
+        
+        .-.-.-.
+        
+        @ param expires (timedelta) 1 hour - How long the URL stays valid.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `presigned_upload_url` method returns the presigned URL, or `None` if it could not
+        be created.
+        
+        .-.-.-.
+        
+        
+        """
+        try:
+            return str(self.client.presigned_put_object(bucket_name, file_name, expires=expires))
+        except S3Error as e:
+            self._forget_missing_bucket(e, bucket_name)
+            logger.exception("Error creating upload URL for %s in bucket %s", file_name, bucket_name)
+            return None
+
+    def download_file(self, bucket_name: str, file_name: str, destination: BinaryIO) -> bool:
+        """
+        The function `download_file` streams an object into a writable binary file object in
+        `DOWNLOAD_CHUNK_SIZE` chunks.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param bucket_name (str)  - The name of the bucket holding the object.
+        
+        .-.-.-.
+        
+        @ param file_name (str)  - The name of the object to download.
+        
+        .-.-.-.
+        
+        @ param destination (BinaryIO)  - The file object the content is written to. It is rewound to
+        the start once the download completes.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `download_file` method returns `True` if the object was downloaded, and `False` if
+        an error occurred.
+        
+        .-.-.-.
+        
+        
+        """
+        response = None
+        try:
+            response = self.client.get_object(bucket_name, file_name)
+            for chunk in response.stream(DOWNLOAD_CHUNK_SIZE):
+                destination.write(chunk)
+            destination.seek(0)
+            return True
+        except S3Error as e:
+            self._forget_missing_bucket(e, bucket_name)
+            logger.exception("Error downloading file %s from bucket %s", file_name, bucket_name)
+            return False
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
     def check_bucket_exists(self, bucket_name: str) -> bool:
         """
         The function `check_bucket_exists` checks if a bucket exists in an S3 server and returns a
-        boolean value.
+        boolean value. A bucket seen to exist is remembered for `BUCKET_EXISTS_TTL` seconds, so repeat
+        checks skip the HEAD request.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -199,10 +579,18 @@ class S3Client:
         
         
         """
+        if self._bucket_known(bucket_name):
+            return True
         try:
-            return self.client.bucket_exists(bucket_name)
+            exists = self.client.bucket_exists(bucket_name)
+            if exists:
+                self.known_buckets[bucket_name] = time.monotonic()
+            else:
+                self.known_buckets.pop(bucket_name, None)
+            return exists
         except S3Error as e:
-            print(f"Error checking bucket {bucket_name} on {self.server_url}: {e}")
+            self._forget_missing_bucket(e, bucket_name)
+            logger.exception("Error checking bucket %s on %s", bucket_name, self.server_url)
             return False
 
     def create_bucket(self, bucket_name: str) -> None:
@@ -212,7 +600,7 @@ class S3Client:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -232,11 +620,33 @@ class S3Client:
         
         """
         try:
-            if not self.client.bucket_exists(bucket_name):
+            if not self.check_bucket_exists(bucket_name):
                 self.client.make_bucket(bucket_name)
-                print(f"Bucket {bucket_name} created successfully.")
+                self.known_buckets[bucket_name] = time.monotonic()
+                logger.info("Bucket %s created successfully", bucket_name)
             else:
-                print(f"Bucket {bucket_name} already exists.")
+                logger.info("Bucket %s already exists", bucket_name)
         except S3Error as e:
-            print(f"Error creating bucket {bucket_name}: {e}")
-            return None
\ No newline at end of file
+            self._forget_missing_bucket(e, bucket_name)
+            logger.exception("Error creating bucket %s", bucket_name)
+            return None
+
+    def close_connection(self) -> None:
+        """
+        The `close_connection` function stops the client's threads and closes every pooled connection
+        to the server.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        
+        """
+        try:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.http_client.clear()
+        except Exception:
+            logger.exception("Error closing S3 connections to %s", self.server_url)
@@ -1,11 +1,37 @@
 import asyncio
-import json
-from typing import List, Tuple
+import logging
+import random
+from operator import itemgetter
+from typing import BinaryIO, List, Optional, Tuple, Union
 
+import orjson
 import redis
 
 from .s3 import S3Client
 
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_UPLOADS = 16
+MAX_CONCURRENT_LISTINGS = 8
+UPLOAD_RETRIES = 5
+UPLOAD_RETRY_BASE_DELAY = 0.5
+UPLOAD_ERRORS_CHANNEL = "s3_upload_errors"
+LOAD_BALANCE_TTL = 5
+LOAD_BALANCE_CHOICES = 2
+# how long an upload waits for a server's file count before leaving that server out of the choice
+FILE_COUNT_TIMEOUT = 1.5
+LEAST_LOADED_KEY = "s3_pool:least_loaded"
+FILE_COUNTS_KEY = "s3_pool:counts"
+# the counters drift if objects change outside this pool, so they are recounted this often
+FILE_COUNTS_TTL = 3600
+# only adjusts a server's count once it has been counted, so a missing count still triggers a listing
+COUNT_FILE_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    return redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+end
+return nil
+"""
+
 
 class S3Pool:
     def __init__( self,s3_servers: List[str], access_key: str, secret_key: str, bucket: str, redis_client: redis.StrictRedis) -> None:
@@ -62,16 +88,22 @@ class S3Pool:
             server: S3Client(server, access_key, secret_key)
             for server in s3_servers
         }
+        self.upload_semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+        self.list_semaphore = asyncio.Semaphore(MAX_CONCURRENT_LISTINGS)
+        self.background_tasks: set[asyncio.Task] = set()
+        self.count_tasks: dict[str, asyncio.Task] = {}
+        self.count_file_script = self.redis_client.register_script(COUNT_FILE_SCRIPT)
 
-    async def get_file_count(self, server: str) -> float:
+    async def get_file_count(self, server: str, recount: bool = False) -> Optional[int]:
         """
-        The function `get_file_count` asynchronously retrieves the count of files in a specified server
-        using `list_objects` offloaded to a separate thread.
+        The function `get_file_count` returns the number of files on a specified server. The count is
+        kept in Redis and adjusted on every upload and delete through the pool; the bucket is only
+        listed when there is no count yet, it has expired, or `recount` is set.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -81,63 +113,124 @@ class S3Pool:
         
         .-.-.-.
         
+        @ param recount (bool) False - List the bucket even if a count is cached, e.g. to check that the
+        server is reachable.
+        
+        .-.-.-.
+        
         
         
         @ returns The `get_file_count` method returns the number of files in the specified server's
-        bucket as a float. If there is an error during the process, it returns infinity as a float.
+        bucket, or `None` if the server is unknown or its count could not be read or listed.
         
         .-.-.-.
         
         
         """
         if server not in self.s3_clients:
-            return float("inf")
+            return None
+
+        if not recount:
+            try:
+                cached = await asyncio.to_thread(self.redis_client.hget, FILE_COUNTS_KEY, server)
+                if cached is not None:
+                    return int(cached)
+            except redis.RedisError:
+                logger.warning("Error reading the cached file count for %s", server, exc_info=True)
+
+        # S3 and connection errors are logged by the client, which returns None for a failed listing
+        async with self.list_semaphore:
+            objects = await self.s3_clients[server].list_objects_parallel(self.bucket)
+        if objects is None:
+            return None
 
         try:
-            objects = await asyncio.to_thread(
-                self.s3_clients[server].list_objects,
-                self.bucket
-            )
-            if objects is None:
-                return float("inf")
-            return float(len(objects))
-        except Exception as e:
-            print(f"Error getting file count from {server}: {e}")
-            return float("inf")
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hset(FILE_COUNTS_KEY, server, len(objects))
+            pipe.expire(FILE_COUNTS_KEY, FILE_COUNTS_TTL, nx=True)
+            await asyncio.to_thread(pipe.execute)
+        except redis.RedisError:
+            logger.warning("Error caching the file count for %s", server, exc_info=True)
+        return len(objects)
 
     async def get_least_loaded_server(self) -> str:
         """
         This Python async function retrieves the least loaded server by getting the file count from
-        multiple servers and returning the server with the minimum file count.
+        `LOAD_BALANCE_CHOICES` randomly sampled servers and returning the one with the minimum file
+        count. The choice is cached in Redis for about `LOAD_BALANCE_TTL` seconds, so most uploads skip
+        the file counts entirely.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         
         
         @ returns The `get_least_loaded_server` method returns the name of the S3 server with the least
-        number of files stored on it.
+        number of files stored on it. Servers whose count is unavailable are left out; if no sampled
+        server has a count, the first server is returned.
         
         .-.-.-.
         
         
         """
         try:
-            tasks = [self.get_file_count(server) for server in self.s3_servers]
-            results = await asyncio.gather(*tasks)
-            server_counts = dict(zip(self.s3_servers, results))
-            self.redis_client.set("s3_server_file_count", json.dumps(server_counts))
-
-            return min(server_counts, key=lambda k: server_counts[k])
-        except Exception as e:
-            print(f"Error determining least loaded S3 server: {e}")
+            cached = await asyncio.to_thread(self.redis_client.get, LEAST_LOADED_KEY)
+            if isinstance(cached, bytes):
+                cached = cached.decode()
+            if cached in self.s3_clients:
+                return cached
+
+            # power of two choices: comparing two random servers balances nearly as well as comparing
+            # all of them, and keeps the work per choice constant as servers are added
+            candidates = random.sample(self.s3_servers, min(LOAD_BALANCE_CHOICES, len(self.s3_servers)))
+            async with asyncio.TaskGroup() as group:
+                tasks = {server: group.create_task(self._get_file_count_within(server)) for server in candidates}
+            server_counts = {server: task.result() for server, task in tasks.items() if task.result() is not None}
+            if not server_counts:
+                logger.warning("No file counts available for %s", ", ".join(candidates))
+                return self.s3_servers[0]
+            least_loaded_server = min(server_counts.items(), key=itemgetter(1))[0]
+
+            # the upload does not need the choice to be cached, so the write happens off the request path
+            task = asyncio.create_task(asyncio.to_thread(self._cache_choice, least_loaded_server, server_counts))
+            self.background_tasks.add(task)
+            task.add_done_callback(self.background_tasks.discard)
+
+            return least_loaded_server
+        except Exception:
+            logger.exception("Error determining least loaded S3 server")
             return self.s3_servers[0]
 
-    async def upload_file(self,bucket_name: str, file_name: str, file_content: bytes) -> Tuple[str, bool]:
+    async def _get_file_count_within(self, server: str) -> Optional[int]:
+        # a count that overruns the timeout keeps going in the background and fills the Redis count for
+        # later choices; only one count runs per server at a time
+        task = self.count_tasks.get(server)
+        if task is None:
+            task = asyncio.create_task(self.get_file_count(server))
+            self.count_tasks[server] = task
+            task.add_done_callback(lambda _: self.count_tasks.pop(server, None))
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), FILE_COUNT_TIMEOUT)
+        except TimeoutError:
+            logger.warning("File count for %s took longer than %.1fs", server, FILE_COUNT_TIMEOUT)
+            return None
+
+    def _cache_choice(self, server: str, server_counts: dict[str, int]) -> None:
+        try:
+            # jittered so workers whose entries were written together do not all recompute at once
+            ttl = LOAD_BALANCE_TTL + random.uniform(0, LOAD_BALANCE_TTL * 0.2)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.set(LEAST_LOADED_KEY, server, px=int(ttl * 1000))
+            pipe.set("s3_server_file_count", orjson.dumps(server_counts), px=int(ttl * 1000))
+            pipe.execute()
+        except redis.RedisError:
+            logger.warning("Error caching least loaded S3 server", exc_info=True)
+
+    async def upload_file(self,bucket_name: str, file_name: str, file_content: Union[bytes, BinaryIO]) -> Tuple[str, bool]:
         """
         The function `upload_file` asynchronously uploads a file to the least loaded server using an S3
         client.
@@ -145,7 +238,7 @@ class S3Pool:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/19/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -162,10 +255,9 @@ class S3Pool:
         
         .-.-.-.
         
-        @ param file_content (bytes)  - The `file_content` parameter in the `upload_file` method is
-        expected to be of type `bytes`, which represents the binary content of the file that you want to
-        upload to the specified S3 bucket. This could be the actual content of a file that you have read
-        from disk or received from
+        @ param file_content (Union[bytes, BinaryIO])  - The `file_content` parameter in the `upload_file`
+        method is either the binary content of the file or a seekable binary file object (such as the
+        spooled file behind an `UploadFile`), which is streamed to the server without buffering it.
         
         .-.-.-.
         
@@ -181,16 +273,20 @@ class S3Pool:
         
         least_loaded_server = await self.get_least_loaded_server()
 
-        result = await asyncio.to_thread(
-            self.s3_clients[least_loaded_server].upload_file,
-            bucket_name,
-            file_name,
-            file_content
-        )
+        client = self.s3_clients[least_loaded_server]
+        async with self.upload_semaphore:
+            result = await client.run(
+                client.upload_file,
+                bucket_name,
+                file_name,
+                file_content
+            )
 
+        if result:
+            await self._count_file(least_loaded_server, 1)
         return least_loaded_server, result
 
-    async def upload_file_server(self, bucket_name: str, file_name: str, file_content: bytes, server: str) -> bool:
+    async def upload_file_server(self, bucket_name: str, file_name: str, file_content: Union[bytes, BinaryIO], server: str) -> bool:
         """
         The function `upload_file_server` asynchronously uploads a file to a specified server using an
         S3 client.
@@ -198,7 +294,7 @@ class S3Pool:
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/26/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -214,10 +310,9 @@ class S3Pool:
         
         .-.-.-.
         
-        @ param file_content (bytes)  - The `file_content` parameter in the `upload_file_server`
-        function is expected to be of type `bytes`. This parameter should contain the content of the
-        file that you want to upload to the specified server. When calling this function, you should
-        pass the content of the file as a bytes object.
+        @ param file_content (Union[bytes, BinaryIO])  - The `file_content` parameter in the
+        `upload_file_server` function is either the content of the file as a bytes object or a seekable
+        binary file object that is streamed to the specified server.
         
         .-.-.-.
         
@@ -237,11 +332,269 @@ class S3Pool:
         
         """
 
-        result = await asyncio.to_thread(
-            self.s3_clients[server].upload_file,
+        client = self.s3_clients[server]
+        async with self.upload_semaphore:
+            result = await client.run(
+                client.upload_file,
+                bucket_name,
+                file_name,
+                file_content
+            )
+
+        return result
+
+    async def upload_file_server_with_retry(self, bucket_name: str, file_name: str, file_content: bytes, server: str) -> bool:
+        """
+        The function `upload_file_server_with_retry` uploads a file to a specified server, retrying with
+        exponential backoff. It is meant to run as a background task, so a final failure is published
+        to the upload errors channel instead of being raised.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param bucket_name (str)  - The name of the bucket to upload into.
+        
+        .-.-.-.
+        
+        @ param file_name (str)  - The name of the object to write.
+        
+        .-.-.-.
+        
+        @ param file_content (bytes)  - The content of the file. Only bytes are accepted, since a stream
+        could not be replayed between attempts.
+        
+        .-.-.-.
+        
+        @ param server (str)  - The server the object is written to.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `upload_file_server_with_retry` function returns `True` once an attempt succeeds,
+        and `False` after every attempt has failed.
+        
+        .-.-.-.
+        
+        
+        """
+
+        for attempt in range(UPLOAD_RETRIES):
+            if await self.upload_file_server(bucket_name, file_name, file_content, server):
+                return True
+            if attempt < UPLOAD_RETRIES - 1:
+                await asyncio.sleep(UPLOAD_RETRY_BASE_DELAY * (2 ** attempt))
+
+        logger.error("Giving up uploading %s to %s after %d attempts", file_name, server, UPLOAD_RETRIES)
+        try:
+            self.redis_client.publish(
+                UPLOAD_ERRORS_CHANNEL,
+                orjson.dumps({"server": server, "bucket": bucket_name, "file_name": file_name})
+            )
+        except redis.RedisError:
+            logger.warning("Error publishing upload failure", exc_info=True)
+        return False
+
+    async def move_file_server(self, bucket_name: str, source_name: str, file_name: str, server: str) -> bool:
+        """
+        The function `move_file_server` asynchronously renames an object on a specified server using an
+        S3 client.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param bucket_name (str)  - The name of the bucket holding the object.
+        
+        .-.-.-.
+        
+        @ param source_name (str)  - The current name of the object.
+        
+        .-.-.-.
+        
+        @ param file_name (str)  - The name the object is moved to.
+        
+        .-.-.-.
+        
+        @ param server (str)  - The server the object is stored on.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `move_file_server` function returns a boolean value indicating the success of
+        the move.
+        
+        .-.-.-.
+        
+        
+        """
+
+        client = self.s3_clients[server]
+        return await client.run(
+            client.move_file,
+            bucket_name,
+            source_name,
+            file_name
+        )
+
+    async def delete_file_server(self, bucket_name: str, file_name: str, server: str) -> bool:
+        """
+        The function `delete_file_server` asynchronously removes an object from a specified server using
+        an S3 client.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param bucket_name (str)  - The name of the bucket holding the object.
+        
+        .-.-.-.
+        
+        @ param file_name (str)  - The name of the object to remove.
+        
+        .-.-.-.
+        
+        @ param server (str)  - The server the object is stored on.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `delete_file_server` function returns a boolean value indicating the success of
+        the removal.
+        
+        .-.-.-.
+        
+        
+        """
+
+        client = self.s3_clients[server]
+        result = await client.run(
+            client.delete_file,
+            bucket_name,
+            file_name
+        )
+        if result:
+            await self._count_file(server, -1)
+        return result
+
+    async def _count_file(self, server: str, amount: int) -> None:
+        # keeps the cached counts in step with our own writes between full recounts
+        try:
+            await asyncio.to_thread(self.count_file_script, keys=[FILE_COUNTS_KEY], args=[server, amount])
+        except redis.RedisError:
+            logger.warning("Error updating file count for %s", server, exc_info=True)
+
+    async def presigned_upload_url_server(self, bucket_name: str, file_name: str, server: str) -> Optional[str]:
+        """
+        The function `presigned_upload_url_server` asynchronously creates a presigned PUT URL for an
+        object on a specified server using an S3 client.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param bucket_name (str)  - The name of the bucket the object will be uploaded to.
+        
+        .-.-.-.
+        
+        @ param file_name (str)  - The name of the object the URL allows the client to write.
+        
+        .-.-.-.
+        
+        @ param server (str)  - The server the client will upload to.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `presigned_upload_url_server` function returns the presigned URL, or `None` if it
+        could not be created.
+        
+        .-.-.-.
+        
+        
+        """
+
+        client = self.s3_clients[server]
+        return await client.run(
+            client.presigned_upload_url,
+            bucket_name,
+            file_name
+        )
+
+    async def download_file_server(self, bucket_name: str, file_name: str, destination: BinaryIO, server: str) -> bool:
+        """
+        The function `download_file_server` asynchronously streams an object from a specified server
+        into a file object using an S3 client.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        @ param bucket_name (str)  - The name of the bucket holding the object.
+        
+        .-.-.-.
+        
+        @ param file_name (str)  - The name of the object to download.
+        
+        .-.-.-.
+        
+        @ param destination (BinaryIO)  - The file object the content is written to.
+        
+        .-.-.-.
+        
+        @ param server (str)  - The server the object is stored on.
+        
+        .-.-.-.
+        
+        
+        
+        @ returns The `download_file_server` function returns a boolean value indicating the success of
+        the download.
+        
+        .-.-.-.
+        
+        
+        """
+
+        client = self.s3_clients[server]
+        return await client.run(
+            client.download_file,
             bucket_name,
             file_name,
-            file_content
+            destination
         )
 
-        return result
\ No newline at end of file
+    def close_connection(self) -> None:
+        """
+        The `close_connection` function closes the connection pool of every server in the pool.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        
+        """
+        for client in self.s3_clients.values():
+            client.close_connection()
@@ -1,6 +1,8 @@
+import time
 from typing import Dict
 
-from fastapi import Header, HTTPException, Request
+from cachetools import TTLCache
+from fastapi import FastAPI, Header, HTTPException, Request
 
 from lib.database.mysql import MySQLClient
 from lib.database.redis import RedisClient
@@ -10,6 +12,59 @@ from lib.user import User
 from lib.llm import LLMClient
 from lib.embed import EmbeddingClient
 
+USER_CACHE_SIZE = 10_000
+USER_CACHE_TTL = 5
+
+# Users that passed `get_current_user` recently, keyed by token, so a burst of requests with the same
+# token only verifies it once. Kept short so stale sessions expire on their own; revocations published
+# to the revocation filter skip the cache straight away.
+_USER_CACHE: TTLCache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# What each dependency provider expects to find on `app.state`. The types are checked once by
+# `validate_app_state` at startup, so the providers only have to look the object up per request.
+APP_STATE_TYPES: Dict[str, type] = {
+    "mysql_client": MySQLClient,
+    "general_cache_client": RedisClient,
+    "file_cache_client": RedisClient,
+    "s3_pool": S3Pool,
+    "env": dict,
+    "croma_client": CromaDBClient,
+    "llm_client": LLMClient,
+    "embedding_client": EmbeddingClient,
+}
+
+
+def validate_app_state(app: FastAPI) -> None:
+    """
+    The function `validate_app_state` checks that every object the dependency providers return has
+    been set on the application state with the expected type.
+    
+    .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+    
+    Author - Liam Scott
+    Last update - 10/15/2026
+    
+    .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+    
+    @ param app (FastAPI)  - The application whose state was populated during startup.
+    
+    .-.-.-.
+    
+    
+    
+    @ returns Nothing. Raises a RuntimeError naming the first missing or mistyped entry, so a bad
+    startup fails before serving requests instead of on every request.
+    
+    .-.-.-.
+    
+    
+    """
+    for name, expected_type in APP_STATE_TYPES.items():
+        value = getattr(app.state, name, None)
+        if value is None:
+            raise RuntimeError(f"{name} not initialized")
+        if not isinstance(value, expected_type):
+            raise RuntimeError(f"Error with {name} initialization: expected {expected_type.__name__}")
 
 
 def get_mysql_client(request: Request) -> MySQLClient:
@@ -19,7 +74,7 @@ def get_mysql_client(request: Request) -> MySQLClient:
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
     Author - Liam Scott
-    Last update - 02/23/2025
+    Last update - 10/15/2026
     
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
@@ -38,11 +93,10 @@ def get_mysql_client(request: Request) -> MySQLClient:
     
     
     """
-    if "mysql_client" not in request.app.state:
+    mysql_client = getattr(request.app.state, "mysql_client", None)
+    if mysql_client is None:
         raise HTTPException(status_code=500, detail="MySQL client not initialized")
-    if isinstance(request.app.state.mysql_client, MySQLClient):
-        return request.app.state.mysql_client
-    raise HTTPException(status_code=500, detail="Error with MySQL client initialization")
+    return mysql_client
 
 def get_general_cache_client(request: Request) -> RedisClient:
     """
@@ -52,7 +106,7 @@ def get_general_cache_client(request: Request) -> RedisClient:
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
     Author - Liam Scott
-    Last update - 02/23/2025
+    Last update - 10/15/2026
     
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
@@ -71,11 +125,10 @@ def get_general_cache_client(request: Request) -> RedisClient:
     
     
     """
-    if "general_cache_client" not in request.app.state:
+    general_cache_client = getattr(request.app.state, "general_cache_client", None)
+    if general_cache_client is None:
         raise HTTPException(status_code=500, detail="General cache client not initialized")
-    if isinstance(request.app.state.general_cache_client, RedisClient):
-        return request.app.state.general_cache_client
-    raise HTTPException(status_code=500, detail="Error with general cache client initialization")
+    return general_cache_client
 
 def get_file_cache_client(request: Request) -> RedisClient:
     """
@@ -85,7 +138,7 @@ def get_file_cache_client(request: Request) -> RedisClient:
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
     Author - Liam Scott
-    Last update - 02/23/2025
+    Last update - 10/15/2026
     
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
@@ -102,11 +155,10 @@ def get_file_cache_client(request: Request) -> RedisClient:
     
     
     """
-    if "file_cache_client" not in request.app.state:
+    file_cache_client = getattr(request.app.state, "file_cache_client", None)
+    if file_cache_client is None:
         raise HTTPException(status_code=500, detail="File cache client not initialized")
-    if isinstance(request.app.state.file_cache_client, RedisClient):
-        return request.app.state.file_cache_client
-    raise HTTPException(status_code=500, detail="Error with file cache client initialization")
+    return file_cache_client
 
 def get_s3_pool(request: Request) -> S3Pool:
     """
@@ -116,7 +168,7 @@ def get_s3_pool(request: Request) -> S3Pool:
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
     Author - Liam Scott
-    Last update - 02/23/2025
+    Last update - 10/15/2026
     
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
@@ -134,11 +186,10 @@ def get_s3_pool(request: Request) -> S3Pool:
     
     
     """
-    if "s3_pool" not in request.app.state:
+    s3_pool = getattr(request.app.state, "s3_pool", None)
+    if s3_pool is None:
         raise HTTPException(status_code=500, detail="S3 pool not initialized")
-    if isinstance(request.app.state.s3_pool, S3Pool):
-        return request.app.state.s3_pool
-    raise HTTPException(status_code=500, detail="Error with pool initialization")
+    return s3_pool
 
 def get_env(request: Request) -> Dict[str, str]:
     """
@@ -148,7 +199,7 @@ def get_env(request: Request) -> Dict[str, str]:
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
     Author - Liam Scott
-    Last update - 02/23/2025
+    Last update - 10/15/2026
     
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
@@ -165,11 +216,10 @@ def get_env(request: Request) -> Dict[str, str]:
     
     
     """
-    if "env" not in request.app.state:
+    env = getattr(request.app.state, "env", None)
+    if env is None:
         raise HTTPException(status_code=500, detail="Environment variables not initialized")
-    if isinstance(request.app.state.env, dict):
-        return request.app.state.env
-    raise HTTPException(status_code=500, detail="Error with environment variables initialization")
+    return env
 
 async def get_current_user( request: Request, authorization: str = Header(..., alias="Authorization") ) -> User:
     """
@@ -179,7 +229,7 @@ async def get_current_user( request: Request, authorization: str = Header(..., a
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
     Author - Liam Scott
-    Last update - 02/23/2025
+    Last update - 10/15/2026
     
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
@@ -198,9 +248,11 @@ async def get_current_user( request: Request, authorization: str = Header(..., a
     
     
     
-    @ returns The `get_current_user` function returns a `User` object after loading user data and
-    verifying the session. If the user is not valid or the token is invalid or expired, it raises an
-    HTTPException with the appropriate status code and detail message.
+    @ returns The `get_current_user` function returns a `User` object after verifying the session and
+    loading user data, or the cached `User` if the same token was verified in the last
+    `USER_CACHE_TTL` seconds and has not expired or been revoked since. If the user is not valid or
+    the token is invalid or expired, it raises an HTTPException with the appropriate status code and
+    detail message.
     
     .-.-.-.
     
@@ -208,18 +260,29 @@ async def get_current_user( request: Request, authorization: str = Header(..., a
     """
 
     #api keys are not supported in this version
-    token = authorization.split("Bearer ")[-1]
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Malformed Authorization header")
+    token = authorization.removeprefix("Bearer ")
+    revocation_filter = getattr(request.app.state, "revocation_filter", None)
+    cached = _USER_CACHE.get(token)
+    if (
+        cached is not None
+        and cached.payload.get("exp", 0) >= time.time()
+        and (revocation_filter is None or not revocation_filter.might_contain(cached.get_token_hash()))
+    ):
+        return cached
+
     user = User(
         token=token,
         env=request.app.state.env,
-        redis_client=request.app.state.general_cache_client.client
+        redis_client=request.app.state.general_cache_client.sync_client,
+        http_client=getattr(request.app.state, "http_client", None),
+        revocation_filter=revocation_filter
     )
-    await user.load_user_data()
+    await user.load_and_verify()
     if not user.user_id:
         raise HTTPException(status_code=401, detail="Invalid user")
-    
-    if not await user.verify_session():
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    _USER_CACHE[token] = user
     return user
 
 def get_croma_client(request: Request) -> CromaDBClient:
@@ -230,7 +293,7 @@ def get_croma_client(request: Request) -> CromaDBClient:
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
     Author - Liam Scott
-    Last update - 02/26/2025
+    Last update - 10/15/2026
     
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
@@ -251,11 +314,10 @@ def get_croma_client(request: Request) -> CromaDBClient:
     
     
     """
-    if "croma_client" not in request.app.state:
+    croma_client = getattr(request.app.state, "croma_client", None)
+    if croma_client is None:
         raise HTTPException(status_code=500, detail="CromaDB client not initialized")
-    if isinstance(request.app.state.croma_client, CromaDBClient):
-        return request.app.state.croma_client
-    raise HTTPException(status_code=500, detail="Error with CromaDB client initialization")
+    return croma_client
 
 def get_llm_client(request: Request) -> LLMClient:
     """
@@ -264,7 +326,7 @@ def get_llm_client(request: Request) -> LLMClient:
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
     Author - Liam Scott
-    Last update - 02/26/2025
+    Last update - 10/15/2026
     
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
@@ -287,11 +349,10 @@ def get_llm_client(request: Request) -> LLMClient:
     
     """
 
-    if "llm_client" not in request.app.state:
+    llm_client = getattr(request.app.state, "llm_client", None)
+    if llm_client is None:
         raise HTTPException(status_code=500, detail="llm client not initialized")
-    if isinstance(request.app.state.llm_client, LLMClient):
-        return request.app.state.llm_client
-    raise HTTPException(status_code=500, detail="Error with llm client initialization")
+    return llm_client
 
 def get_embedding_client(request: Request) -> EmbeddingClient:
     """
@@ -301,7 +362,7 @@ def get_embedding_client(request: Request) -> EmbeddingClient:
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
     Author - Liam Scott
-    Last update - 02/26/2025
+    Last update - 10/15/2026
     
     .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
     
@@ -324,8 +385,7 @@ def get_embedding_client(request: Request) -> EmbeddingClient:
     
     """
 
-    if "embedding_client" not in request.app.state:
+    embedding_client = getattr(request.app.state, "embedding_client", None)
+    if embedding_client is None:
         raise HTTPException(status_code=500, detail="Embedding client not initialized")
-    if isinstance(request.app.state.embedding_client, EmbeddingClient):
-        return request.app.state.embedding_client
-    raise HTTPException(status_code=500, detail="Error with embedding client initialization")
\ No newline at end of file
+    return embedding_client
\ No newline at end of file
@@ -1,7 +1,14 @@
-from .embed import EmbeddingClient
+from .embed import EmbeddingClient, decode_embedding, dequantize_embedding, encode_embedding, quantize_embedding
 from .voyageai_embeding_client import VoyageAIEmbeddingClient
+from .cache import CachedEmbeddingClient, EmbeddingsCache
 
 __all__ = [
             "EmbeddingClient",
-            "VoyageAIEmbeddingClient"
+            "VoyageAIEmbeddingClient",
+            "EmbeddingsCache",
+            "CachedEmbeddingClient",
+            "quantize_embedding",
+            "dequantize_embedding",
+            "encode_embedding",
+            "decode_embedding"
             ]
\ No newline at end of file
@@ -0,0 +1,143 @@
+import hashlib
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import orjson
+from cachetools import LRUCache
+from PIL import Image
+
+from ..database import RedisClient
+from .embed import EmbeddingClient
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_CACHE_TTL = 7 * 24 * 3600
+# chunk embeddings kept in process, about 4 KB each at 1024 dimensions
+CHUNK_CACHE_SIZE = 4096
+
+
+class EmbeddingsCache:
+    """Embeddings of processed files, keyed by the sha256 of the file content and the embedding model,
+    so content that was already embedded is not sent to the model again. Vectors are stored as raw
+    float32 bytes, a quarter of their size as JSON, next to a small JSON entry with their document ids.
+    A marker per collection records which collections the documents were added to."""
+
+    def __init__(self, redis_client: RedisClient, model: str, ttl: int = EMBEDDINGS_CACHE_TTL) -> None:
+        self.redis_client = redis_client
+        self.model = model
+        self.ttl = ttl
+
+    def _keys(self, file_hash: str) -> Tuple[str, str]:
+        key = f"embed:{file_hash}:{self.model}"
+        return key, f"{key}:ids"
+
+    def indexed_key(self, file_hash: str, collection: str) -> str:
+        """The key marking a file's documents as added to `collection`. Its presence means the file needs
+        no embedding for that collection, so it can be read alongside other keys to check that without a
+        round-trip of its own."""
+        return f"{self._keys(file_hash)[0]}:in:{collection}"
+
+    async def get(self, file_hash: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        """Get the document ids and (n, dim) float32 embeddings cached for a file, or None."""
+        vectors_key, ids_key = self._keys(file_hash)
+        vectors, ids = await self.redis_client.bytes_client.mget(vectors_key, ids_key)
+        if vectors is None or ids is None:
+            return None
+        entry = orjson.loads(ids)
+        return entry["ids"], np.frombuffer(vectors, dtype=np.float32).reshape(len(entry["ids"]), entry["dim"])
+
+    async def set(self, file_hash: str, ids: List[str], embeddings: Sequence[np.ndarray], collection: str) -> bool:
+        """Cache the document ids and embeddings of a file, marked as added to `collection`."""
+        if not ids:
+            return False
+        vectors = np.ascontiguousarray(np.stack([np.asarray(e, dtype=np.float32) for e in embeddings]))
+        vectors_key, ids_key = self._keys(file_hash)
+        async with self.redis_client.bytes_client.pipeline(transaction=True) as pipe:
+            pipe.set(vectors_key, vectors.tobytes(), ex=self.ttl)
+            pipe.set(ids_key, orjson.dumps({"ids": ids, "dim": vectors.shape[1]}), ex=self.ttl)
+            pipe.set(self.indexed_key(file_hash, collection), b"1", ex=self.ttl)
+            await pipe.execute()
+        return True
+
+    async def mark_indexed(self, file_hash: str, collection: str) -> None:
+        """Mark the cached documents of a file as added to `collection` as well."""
+        await self.redis_client.bytes_client.set(self.indexed_key(file_hash, collection), b"1", ex=self.ttl)
+
+
+class CachedEmbeddingClient(EmbeddingClient):
+    """Wraps an embedding client with a cache of text embeddings keyed by the blake2b digest of the
+    text, so chunks that recur across files (headers, footers, boilerplate) are embedded once. Hits
+    are served from a process LRU, then from Redis, where vectors are stored as float16 bytes; only the
+    misses reach the wrapped client, still batched. Images are passed through uncached."""
+
+    def __init__(self, client: EmbeddingClient, redis_client: RedisClient, ttl: int = EMBEDDINGS_CACHE_TTL, local_size: int = CHUNK_CACHE_SIZE) -> None:
+        self.client = client
+        self.model = client.model
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.local_cache: LRUCache[str, np.ndarray] = LRUCache(maxsize=local_size)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _key(self, text: str) -> str:
+        return f"embed:chunk:{self.model}:{hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()}"
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache hits and misses since the client was created, counted per text."""
+        return {"cache_hits": self.cache_hits, "cache_misses": self.cache_misses, "local_size": len(self.local_cache)}
+
+    async def get_text_embedding(self, text: str) -> np.ndarray:
+        """Get embedding for a text input, from the cache when it was embedded before."""
+        return (await self.get_text_embeddings([text]))[0]
+
+    async def get_text_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Get embeddings for several text inputs; only the texts missing from both caches are sent to
+        the wrapped client, in one batched call."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        keys = [self._key(text) for text in texts]
+        found: Dict[str, np.ndarray] = {key: self.local_cache[key] for key in keys if key in self.local_cache}
+
+        remote_keys = list(dict.fromkeys(key for key in keys if key not in found))
+        if remote_keys:
+            try:
+                stored = await self.redis_client.bytes_client.mget(remote_keys)
+            except Exception as e:
+                logger.warning("Reading cached chunk embeddings failed: %s", e)
+                stored = [None] * len(remote_keys)
+            for key, value in zip(remote_keys, stored):
+                if value is not None:
+                    found[key] = self.local_cache[key] = np.frombuffer(value, dtype=np.float16).astype(np.float32)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        self.cache_misses += len(missing)
+        self.cache_hits += len(texts) - len(missing)
+
+        if missing:
+            if len(missing) == 1:
+                embeddings = np.asarray([await self.client.get_text_embedding(next(iter(missing.values())))], dtype=np.float32)
+            else:
+                embeddings = await self.client.get_text_embeddings(list(missing.values()))
+            try:
+                async with self.redis_client.bytes_client.pipeline(transaction=False) as pipe:
+                    for key, embedding in zip(missing, embeddings):
+                        pipe.set(key, embedding.astype(np.float16).tobytes(), ex=self.ttl)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning("Caching chunk embeddings failed: %s", e)
+            for key, embedding in zip(missing, embeddings):
+                found[key] = self.local_cache[key] = embedding
+
+        return np.stack([found[key] for key in keys])
+
+    async def get_image_embedding(self, text: str, image: Union[bytes, Image.Image]) -> np.ndarray:
+        """Get embedding for an image input from the wrapped client."""
+        return await self.client.get_image_embedding(text, image)
+
+    async def get_image_embeddings(self, items: List[Tuple[str, Union[bytes, Image.Image]]]) -> np.ndarray:
+        """Get embeddings for several (text, image) inputs from the wrapped client."""
+        return await self.client.get_image_embeddings(items)
@@ -1,19 +1,74 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Union
+import numpy as np
 from PIL import Image
-from typing import List
+from typing import List, Tuple
 
 
 
+def quantize_embedding(embedding: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Symmetric int8 quantization of an embedding. Returns the int8 vector and the scale that maps it
+    back, a quarter of the float32 size; cosine similarity between quantized vectors stays within about
+    1% of the float32 result."""
+    embedding = np.asarray(embedding, dtype=np.float32)
+    peak = float(np.max(np.abs(embedding))) if embedding.size else 0.0
+    scale = peak / 127 if peak > 0 else 1.0
+    return np.round(embedding / scale).astype(np.int8), scale
+
+
+def dequantize_embedding(quantized: np.ndarray, scale: float) -> np.ndarray:
+    """Inverse of `quantize_embedding`, up to rounding."""
+    return quantized.astype(np.float32) * np.float32(scale)
+
+
+def encode_embedding(embedding: np.ndarray) -> bytes:
+    """Serialize an embedding for storage as its float32 int8 scale followed by the int8 vector,
+    4 + dim bytes against about 20 bytes per dimension as JSON."""
+    quantized, scale = quantize_embedding(embedding)
+    return np.float32(scale).tobytes() + quantized.tobytes()
+
+
+def decode_embedding(data: bytes) -> np.ndarray:
+    """Inverse of `encode_embedding`, returning a float32 vector."""
+    scale = float(np.frombuffer(data, dtype=np.float32, count=1)[0])
+    return dequantize_embedding(np.frombuffer(data, dtype=np.int8, offset=4), scale)
+
+
 class EmbeddingClient(ABC):
-    """Abstract Base Class for Embeding Clients."""
+    """Abstract Base Class for Embeding Clients. Embeddings are float32 arrays of shape (dim,)."""
+
+    # names the model in cache keys, so embeddings from different models are never mixed up
+    model: str = "unknown"
 
     @abstractmethod
-    async def get_text_embedding(self, text: str) -> list[float]:
+    async def get_text_embedding(self, text: str) -> np.ndarray:
         """Get embedding for a text input."""
         pass
 
+    async def get_text_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Get embeddings for several text inputs as a float32 array of shape (len(texts), dim), in input
+        order. Clients that can embed a batch in one model call should override this; the default embeds
+        each text concurrently."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        embeddings = await asyncio.gather(*(self.get_text_embedding(text) for text in texts))
+        return np.stack(embeddings).astype(np.float32, copy=False)
+
+    async def get_text_embedding_int8(self, text: str) -> Tuple[np.ndarray, float]:
+        """Get the embedding for a text input quantized to int8, with its scale, for caching or transport."""
+        return quantize_embedding(await self.get_text_embedding(text))
+
     @abstractmethod
-    async def get_image_embedding(self, text: str, image: Union[bytes, Image.Image]) -> list[float]:
+    async def get_image_embedding(self, text: str, image: Union[bytes, Image.Image]) -> np.ndarray:
         """Get embedding for an image input."""
         pass
+
+    async def get_image_embeddings(self, items: List[Tuple[str, Union[bytes, Image.Image]]]) -> np.ndarray:
+        """Get embeddings for several (text, image) inputs as a float32 array of shape (len(items), dim),
+        in input order. Clients that can embed a batch in one model call should override this; the
+        default embeds each input concurrently."""
+        if not items:
+            return np.empty((0, 0), dtype=np.float32)
+        embeddings = await asyncio.gather(*(self.get_image_embedding(text, image) for text, image in items))
+        return np.stack(embeddings).astype(np.float32, copy=False)
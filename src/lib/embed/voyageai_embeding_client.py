@@ -1,34 +1,123 @@
+import asyncio
+from contextlib import ExitStack
+import numpy as np
 import voyageai
 from PIL import Image
 from io import BytesIO
-from typing import Union
+from typing import List, Optional, Tuple, Union
 from .embed import EmbeddingClient
 
+# inputs per multimodal_embed request; well under the API's limits for the chunk sizes we send
+MAX_BATCH_SIZE = 64
+# how long a single-text request waits for others to share its request
+BATCH_WINDOW = 0.005
+# (text, image) inputs per multimodal_embed request; images cost far more tokens than text chunks
+MAX_IMAGE_BATCH_SIZE = 8
+
 
 class VoyageAIEmbeddingClient(EmbeddingClient):
     """Voyage AI multimodal embedding client."""
 
+    model = "voyage-multimodal-3"
+
     def __init__(self, api_key: str, dim: int = 1024) -> None:
         self.client = voyageai.AsyncClient(api_key)  # type: ignore
         self.dim = dim
 
-    async def get_text_embedding(self, text: str) -> list[float]:
-        response = await self.client.multimodal_embed(
-            inputs=[{"content": text}],
-            model="voyage-multimodal-3"
-        )
-        return response.embeddings[0]
+        # queued (text, future) requests from get_text_embedding, sent together by text_batcher
+        self.text_queue: Optional[asyncio.Queue[Tuple[str, asyncio.Future[np.ndarray]]]] = None
+        self.text_batcher: Optional[asyncio.Task[None]] = None
+
+    async def get_text_embedding(self, text: str) -> np.ndarray:
+        """
+        Get embedding for a text input. Concurrent calls are collected for up to `BATCH_WINDOW` seconds
+        and embedded together in one request.
+        """
+        if self.text_queue is None:
+            self.text_queue = asyncio.Queue()
+        if self.text_batcher is None or self.text_batcher.done():
+            self.text_batcher = asyncio.create_task(self._run_text_batcher(self.text_queue))
+
+        future: asyncio.Future[np.ndarray] = asyncio.get_running_loop().create_future()
+        await self.text_queue.put((text, future))
+        return await future
 
+    async def _run_text_batcher(self, queue: "asyncio.Queue[Tuple[str, asyncio.Future[np.ndarray]]]") -> None:
+        while True:
+            batch = [await queue.get()]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + BATCH_WINDOW
+            while len(batch) < MAX_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
 
-    async def get_image_embedding(self, text: str, image: Union[bytes, Image.Image]) -> list[float]:
+            try:
+                embeddings = await self.get_text_embeddings([text for text, _ in batch])
+                for (_, future), embedding in zip(batch, embeddings):
+                    if not future.done():
+                        future.set_result(embedding)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                # also reached on cancellation, so no caller is left waiting on a batch that never ran
+                for _, future in batch:
+                    if not future.done():
+                        future.cancel()
+
+    async def get_text_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Get embeddings for several text inputs with one request per `MAX_BATCH_SIZE` texts.
+        """
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), MAX_BATCH_SIZE):
+            response = await self.client.multimodal_embed(
+                inputs=[{"content": text} for text in texts[start:start + MAX_BATCH_SIZE]],
+                model=self.model
+            )
+            embeddings.extend(response.embeddings)
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+    async def get_image_embedding(self, text: str, image: Union[bytes, Image.Image]) -> np.ndarray:
         """
-        Get embedding for an image input.
+        Get embedding for an image input. Images opened here from bytes are closed once the request is
+        sent, so their decoded pixels are not left for the garbage collector.
         """
         if isinstance(image, bytes):
-            image = Image.open(BytesIO(image))
+            # BytesIO over bytes shares the caller's buffer instead of copying it
+            with Image.open(BytesIO(image)) as opened:
+                return await self._embed_image(text, opened)
+        return await self._embed_image(text, image)
 
+    async def _embed_image(self, text: str, image: Image.Image) -> np.ndarray:
         response = await self.client.multimodal_embed(
-            inputs=[{text: image}], 
-            model="voyage-multimodal-3"
+            inputs=[{text: image}],
+            model=self.model
         )
-        return response.embeddings[0]
+        return np.asarray(response.embeddings[0], dtype=np.float32)
+
+    async def get_image_embeddings(self, items: List[Tuple[str, Union[bytes, Image.Image]]]) -> np.ndarray:
+        """
+        Get embeddings for several (text, image) inputs with one request per `MAX_IMAGE_BATCH_SIZE`
+        inputs.
+        """
+        embeddings: List[List[float]] = []
+        with ExitStack() as stack:
+            inputs = [
+                {text: stack.enter_context(Image.open(BytesIO(image))) if isinstance(image, bytes) else image}
+                for text, image in items
+            ]
+            for start in range(0, len(inputs), MAX_IMAGE_BATCH_SIZE):
+                response = await self.client.multimodal_embed(
+                    inputs=inputs[start:start + MAX_IMAGE_BATCH_SIZE],
+                    model=self.model
+                )
+                embeddings.extend(response.embeddings)
+        return np.asarray(embeddings, dtype=np.float32)
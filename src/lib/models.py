@@ -1,3 +1,6 @@
+import os
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -9,6 +12,12 @@ class EmbeddingStatusResponse(BaseModel):
 class RemoveKeyRequest(BaseModel):
     api_key: str
 
+class InitUploadRequest(BaseModel):
+    file_name: str
+
+class CommitUploadRequest(BaseModel):
+    file_hash: str  # hex SHA-256 of the uploaded content, computed by the client
+
 
 FILE_TYPE_MAP = {
     # High Priority: Documents & Programming Files (treated as text)
@@ -57,4 +66,12 @@ FILE_TYPE_MAP = {
     ".mov": "VID",
     ".wmv": "VID",
 }
-    
\ No newline at end of file
+
+# derived once at import so checks against it are single set lookups
+FILE_CATEGORIES = frozenset(FILE_TYPE_MAP.values())
+
+
+def classify(filename: str) -> Optional[str]:
+    # the file's category ("TXT", "PDF", "PHO", "AUD", "VID"), or None if the extension is unsupported
+    _, ext = os.path.splitext(filename)
+    return FILE_TYPE_MAP.get(ext.lower())
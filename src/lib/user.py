@@ -1,17 +1,21 @@
 import uuid
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 
 import httpx
+import orjson
 import redis
 from fastapi import HTTPException
 
 from .auth import Auth  # Base authentication class
+from .revocation import RevocationFilter
+
+USER_DATA_TTL = 120
 
 
 # This Python class represents a user with methods to manage API keys and load user data from Auth0.
 class User(Auth):
 
-    def __init__(self, token: str, env: Dict[str, str], redis_client: redis.StrictRedis):
+    def __init__(self, token: str, env: Dict[str, str], redis_client: redis.StrictRedis, http_client: Optional[httpx.AsyncClient] = None, revocation_filter: Optional[RevocationFilter] = None):
         """
         The function initializes various attributes related to user data and API keys using the provided
         token, environment variables, and Redis client.
@@ -43,8 +47,18 @@ class User(Auth):
         
         .-.-.-.
         
+        @ param http_client (Optional[httpx.AsyncClient])  - The shared `httpx.AsyncClient` from the
+        application state, passed through to `Auth` for Auth0 requests.
+        
+        .-.-.-.
+        
+        @ param revocation_filter (Optional[RevocationFilter])  - The shared revocation filter from the
+        application state, passed through to `Auth` for revocation checks.
+        
+        .-.-.-.
+        
         """
-        super().__init__(env, redis_client, token=token)
+        super().__init__(env, redis_client, token=token, http_client=http_client, revocation_filter=revocation_filter)
 
         self.redis_client = redis_client
 
@@ -59,7 +73,8 @@ class User(Auth):
         self.picture = None
         self.email_verified = None
 
-        self.api_keys: List[str] = []
+        # keyed by api key for constant-time lookups and removals; dicts keep insertion order
+        self._api_keys: Dict[str, None] = {}
         
         self.app_metadata = None
 
@@ -70,6 +85,14 @@ class User(Auth):
 
 
 
+    @property
+    def api_keys(self) -> List[str]:
+        return list(self._api_keys)
+
+    @api_keys.setter
+    def api_keys(self, keys: List[str]) -> None:
+        self._api_keys = dict.fromkeys(keys)
+
     async def get_user_api_keys(self) -> List[str]:
         """
         The function `get_user_api_keys` retrieves a list of API keys associated with a user, handling cases
@@ -78,7 +101,7 @@ class User(Auth):
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/13/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -93,8 +116,6 @@ class User(Auth):
         """
         if not self.user_id:
             raise HTTPException(status_code=401, detail="User ID not found")
-        if not self.api_keys:
-            return []
         return self.api_keys
 
     async def update_user_api_keys(self, new_keys: List[str]) -> List[str]:
@@ -104,7 +125,7 @@ class User(Auth):
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/13/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -129,12 +150,15 @@ class User(Auth):
         headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
         url = f"https://{self.auth0_domain}/api/v2/users/{self.user_id}"
         data = {"app_metadata": {"api_keys": new_keys}}
-        async with httpx.AsyncClient() as client:
-            resp = await client.patch(url, headers=headers, json=data)
-            if resp.status_code != 200:
-                raise HTTPException(status_code=resp.status_code, detail="Failed to update user metadata")
-            self.api_keys = new_keys
-            return self.api_keys
+        resp = await self.http_request("PATCH", url, headers=headers, json=data)
+        if resp.status_code != 200:
+            raise HTTPException(status_code=resp.status_code, detail="Failed to update user metadata")
+        self.api_keys = new_keys
+        try:
+            self.redis_client.delete(f"user:{self.user_id}")
+        except Exception as e:
+            print(f"Failed to invalidate cached user data: {str(e)}")
+        return self.api_keys
 
 
     async def create_api_key(self) -> str:
@@ -145,7 +169,7 @@ class User(Auth):
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/13/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -160,28 +184,32 @@ class User(Auth):
         if not self.user_id:
             raise HTTPException(status_code=401, detail="User ID not found")
         new_key = str(uuid.uuid4())
-        self.api_keys.append(new_key)
+        self._api_keys[new_key] = None
         await self.update_user_api_keys(self.api_keys)
         return new_key
         
 
-    async def remove_api_key(self) -> None:
+    async def remove_api_key(self, api_key: str) -> None:
         """
         The `remove_api_key` function removes a specific API key associated with a user.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/13/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
+        @ param api_key (str)  - The API key to remove from the user's keys.
+        
+        .-.-.-.
+        
         
         
         @ returns If the `user_id` is not found, a `HTTPException` with status code 401 and detail "User ID
-        not found" will be raised. If there are no `api_keys` present, the function will return without
-        making any changes. If there are `api_keys` present, the function will remove the current `api_key`
-        from the list of `api_keys`, update the
+        not found" will be raised. If the user does not have `api_key`, the function will return without
+        making any changes. Otherwise the function will remove `api_key` from the user's `api_keys`,
+        update the
         
         .-.-.-.
         
@@ -189,23 +217,49 @@ class User(Auth):
         """
         if not self.user_id:
             raise HTTPException(status_code=401, detail="User ID not found")
-        if not self.api_keys:
+        if api_key not in self._api_keys:
             return
 
-        new_keys = [key for key in self.api_keys if key != self.api_key]
-        await self.update_user_api_keys(new_keys)
-        self.api_keys = new_keys
+        remaining = dict(self._api_keys)
+        del remaining[api_key]
+        await self.update_user_api_keys(list(remaining))
        
         
+    async def load_and_verify(self) -> None:
+        """
+        The `load_and_verify` function verifies the session of the token and then loads the user data
+        for the subject of the verified payload.
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        Author - Liam Scott
+        Last update - 10/15/2026
+        
+        .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
+        
+        
+        
+        @ returns Nothing. Raises an HTTPException if the session is invalid; the user data is only
+        loaded once the payload has been decoded, since `load_user_data` reads the user ID from it.
+        
+        .-.-.-.
+        
+        
+        """
+        await self.verify_session()
+        await self.load_user_data()
+
     async def load_user_data(self) -> None:
         """
         The `load_user_data` function retrieves user metadata from an external API using an authentication
-        token and populates various attributes of the class instance with the retrieved data.
+        token and populates various attributes of the class instance with the retrieved data. The user
+        data is cached in Redis under `user:{user_id}` for `USER_DATA_TTL` seconds, so only the first
+        request in that window goes to Auth0.
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
         Author - Liam Scott
-        Last update - 02/13/2025
+        Last update - 10/15/2026
         
         .-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.-.
         
@@ -227,24 +281,40 @@ class User(Auth):
         
         self.user_id = user_id
 
+        cache_key = f"user:{user_id}"
+        try:
+            stored = self.redis_client.get(cache_key)
+        except Exception as e:
+            print(f"Failed to read user data from cache: {str(e)}")
+            stored = None
+        if stored:
+            self._set_user_data(orjson.loads(stored))
+            return
+
         mgmt_token = await self.get_auth0_management_token()
         headers = {"Authorization": f"Bearer {mgmt_token}"}
         url = f"https://{self.auth0_domain}/api/v2/users/{user_id}"
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers=headers)
-            if resp.status_code != 200:
-                raise HTTPException(status_code=resp.status_code, detail="Failed to retrieve user metadata")
-            user_data = resp.json()
-            self.nickname = user_data.get("nickname", None)
-            self.name = user_data.get("name", None)
-            self.username = user_data.get("username", None)
-            self.email = user_data.get("email", None)
-            self.picture = user_data.get("picture", None)
-            self.email_verified = user_data.get("email_verified", None)
-            self.identities = user_data.get("identities", None)
-            self.app_metadata = user_data.get("app_metadata", None)
-            self.created_at = user_data.get("created_at", None)
-            self.updated_at = user_data.get("updated_at", None)
-            self.api_keys = self.app_metadata.get("api_keys", []) if self.app_metadata else []
+        resp = await self.http_request("GET", url, headers=headers)
+        if resp.status_code != 200:
+            raise HTTPException(status_code=resp.status_code, detail="Failed to retrieve user metadata")
+        user_data = orjson.loads(resp.content)
+        try:
+            self.redis_client.setex(cache_key, USER_DATA_TTL, orjson.dumps(user_data))
+        except Exception as e:
+            print(f"Failed to cache user data: {str(e)}")
+        self._set_user_data(user_data)
+
+    def _set_user_data(self, user_data: Dict[str, Any]) -> None:
+        self.nickname = user_data.get("nickname", None)
+        self.name = user_data.get("name", None)
+        self.username = user_data.get("username", None)
+        self.email = user_data.get("email", None)
+        self.picture = user_data.get("picture", None)
+        self.email_verified = user_data.get("email_verified", None)
+        self.identities = user_data.get("identities", None)
+        self.app_metadata = user_data.get("app_metadata", None)
+        self.created_at = user_data.get("created_at", None)
+        self.updated_at = user_data.get("updated_at", None)
+        self.api_keys = self.app_metadata.get("api_keys", []) if self.app_metadata else []
         
 
@@ -0,0 +1,17 @@
+import time
+from datetime import datetime, timezone
+from typing import Tuple
+
+# (unix second, ISO 8601 string for that second); rebuilt at most once per second
+_iso_cache: Tuple[int, str] = (0, "")
+
+
+def utcnow_iso() -> str:
+    """Current UTC time as an ISO 8601 string at one second resolution."""
+    global _iso_cache
+    now = time.time_ns() // 1_000_000_000
+    cached_second, cached_iso = _iso_cache
+    if now != cached_second:
+        cached_iso = datetime.fromtimestamp(now, tz=timezone.utc).isoformat()
+        _iso_cache = (now, cached_iso)
+    return cached_iso
@@ -1,18 +1,36 @@
 import asyncio
+import hashlib
+import logging
+import logging.handlers
 import os
+import queue
+import ssl
 from contextlib import asynccontextmanager
 from typing import Any, AsyncGenerator, Type
 
+import httpx
 from dotenv import load_dotenv
 from fastapi import FastAPI
 
-from lib import MySQLClient, RedisClient, S3Pool, CromaDBClient, GoogleLLMClient, VoyageAIEmbeddingClient
+from lib import MySQLClient, RedisClient, S3Pool, CromaDBClient, GoogleLLMClient, VoyageAIEmbeddingClient, CachedEmbeddingClient, RevocationFilter, validate_app_state
 from routes import router as base_router
+from services import run_embedding_worker, shutdown_render_pool
 
 FILE_VERSION = "0.1.0"
 
 # Load environment variables
 load_dotenv()
+# one snapshot of the environment, shared by everything that is handed the env mapping; requests
+# read it from app.state.env instead of copying os.environ
+ENV = dict(os.environ)
+# Log records are handed to a queue and written by a listener thread, so a slow stdout never blocks
+# the event loop
+log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+log_output = logging.StreamHandler()
+log_output.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+log_listener = logging.handlers.QueueListener(log_queue, log_output)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper(), handlers=[logging.handlers.QueueHandler(log_queue)])
+log_listener.start()
 def get_env(var: str, conv: Type[Any] = str) -> Any:
     value = os.getenv(var)
     if value is None:
@@ -23,49 +41,61 @@ file_cache_client = RedisClient(
     host=get_env("FILE_CACHE_HOST"),
     port=int(get_env("FILE_CACHE_PORT")),
     db=0,
-    decode_responses=True
+    unix_socket_path=os.getenv("FILE_CACHE_SOCKET") or None,
+    # JSON metadata is parsed straight from bytes and embedding vectors are stored as raw float32
+    # bytes, so values are not decoded to str on the way in
+    decode_responses=False,
+    local_cache_ttl=float(os.getenv("FILE_CACHE_LOCAL_TTL", "0"))
 )
 general_cache_client = RedisClient(
     host=get_env("GENRAL_CACHE_HOST"),
     port=int(get_env("GENRAL_CACHE_PORT")),
     db=0,
+    unix_socket_path=os.getenv("GENRAL_CACHE_SOCKET") or None,
     decode_responses=True
 )
 
 
+# Every uvicorn worker opens its own pool, so the server's connection limit is split between them
+mysql_workers = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+mysql_maxsize = max(int(os.getenv("MYSQL_MAX_CONNECTIONS", "100")) // mysql_workers, 1)
 mysql_client = MySQLClient(
     host=get_env("MYSQL_HOST"),
     user=get_env("MYSQL_USER"),
     password=get_env("MYSQL_PASSWORD"),
     database=get_env("MYSQL_DATABASE"),
-    port=int(get_env("MYSQL_PORT"))
+    port=int(get_env("MYSQL_PORT")),
+    minsize=min(10, mysql_maxsize),
+    maxsize=mysql_maxsize
 )
 
 s3_servers = get_env("S3_SERVERS").split(",")
+# a server that has not answered its startup check within this many seconds counts as unreachable
+s3_startup_timeout = float(os.getenv("S3_STARTUP_TIMEOUT", "3"))
 s3_pool = S3Pool(
     s3_servers,
     get_env("S3_ACCESS_KEY"),
     get_env("S3_SECRET_KEY"),
     get_env("BUCKET_NAME"),
-    general_cache_client.client  
+    general_cache_client.sync_client
 )
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     try:
-        if not general_cache_client.client.ping():
+        if not await general_cache_client.client.ping():
             raise ConnectionError("KeyDB is not reachable.")
         print("general_cache_client connection established.")
     except Exception as e:
         raise RuntimeError(f"Failed to connect to KeyDB: {str(e)}")
 
     try:
-        if not file_cache_client.client.ping():
+        if not await file_cache_client.client.ping():
             raise ConnectionError("Redis is not reachable.")
         print("file_cache_client connection established.")
     except Exception as e:
-        general_cache_client.close_connection()
+        await general_cache_client.close_connection()
         raise RuntimeError(f"Failed to connect to Redis: {str(e)}")
 
     await mysql_client.connect()
@@ -75,30 +105,52 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         print("MySQL connection established.")
 
     try:
-        results = await asyncio.gather(*(s3_pool.get_file_count(server) for server in s3_pool.s3_servers))
+        results = await asyncio.gather(
+            *(asyncio.wait_for(s3_pool.get_file_count(server, recount=True), s3_startup_timeout) for server in s3_pool.s3_servers),
+            return_exceptions=True
+        )
         print(results)
-        if any(result == float('inf') for result in results):
+        if any(result is None or isinstance(result, BaseException) for result in results):
             raise ConnectionError("Some or all S3 servers are not reachable.")
         print("S3 servers are reachable.")
     except Exception as e:
-        general_cache_client.close_connection()
-        file_cache_client.close_connection()
+        await general_cache_client.close_connection()
+        await file_cache_client.close_connection()
         await mysql_client.close()
         raise RuntimeError(f"Failed to connect to S3 servers: {str(e)}")
 
+    revocation_filter = RevocationFilter(general_cache_client.sync_client)
+    revocation_filter.start()
+
     app.state.mysql_client = mysql_client
     app.state.general_cache_client = general_cache_client
     app.state.file_cache_client = file_cache_client
     app.state.s3_pool = s3_pool
-    app.state.croma_client = CromaDBClient(dict(os.environ))
-    app.state.env = dict(os.environ)
+    app.state.http_client = httpx.AsyncClient(
+        timeout=10.0,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+    )
+    app.state.revocation_filter = revocation_filter
+    app.state.croma_client = CromaDBClient(ENV)
+    app.state.env = ENV
     app.state.llm_client = GoogleLLMClient(os.environ["GOOGLE_LLM_API_KEY"], os.environ["GOOGLE_LLM_DEFAULT_MODEL"], bool(os.environ["GOOGLE_LLM_GROUNDING"]))
-    app.state.embeding_client = VoyageAIEmbeddingClient(os.environ["VOYAGEAI_API_KEY"], int(os.environ["EMBEDING_DIM"]))
+    # text embeddings are cached by content, so chunks that recur across files are embedded once
+    app.state.embedding_client = CachedEmbeddingClient(
+        VoyageAIEmbeddingClient(os.environ["VOYAGEAI_API_KEY"], int(os.environ["EMBEDING_DIM"])),
+        file_cache_client
+    )
+    validate_app_state(app)
+    embedding_worker = asyncio.create_task(run_embedding_worker(app))
+
+    # upload hashing (ours and Minio's payload signing) runs through hashlib, which only gets the
+    # SHA-NI / ARMv8 crypto paths when it is backed by OpenSSL
+    sha256_backend = "OpenSSL" if hashlib.sha256.__name__.startswith("openssl_") else "builtin"
+    print(f"sha256 backend: {sha256_backend} ({ssl.OPENSSL_VERSION})")
 
     print("-" * 20)
     print("Routes:")
     print("  /upload/")
-    print("  /embedding-status/{embedding_id}")
+    print("  /upload/status/{embedding_id}?wait=<seconds>")
     print("  /apikeys/new")
     print("  /apikeys")
     print("  /apikeys/remove")
@@ -108,10 +160,17 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     yield
 
     # Shutdown: Close the connections
-    general_cache_client.close_connection()
-    file_cache_client.close_connection()
+    embedding_worker.cancel()
+    await asyncio.gather(embedding_worker, return_exceptions=True)
+    revocation_filter.stop()
+    await general_cache_client.close_connection()
+    await file_cache_client.close_connection()
     await mysql_client.close()
+    s3_pool.close_connection()
+    shutdown_render_pool()
+    await app.state.http_client.aclose()
     print("Connections closed.")
+    log_listener.stop()
 
 
 app = FastAPI(lifespan=lifespan, title="RagStack", description=f"Backend Version: {FILE_VERSION}", version=FILE_VERSION, root_path="/src",)
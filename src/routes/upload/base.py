@@ -1,7 +1,7 @@
-from fastapi import APIRouter, BackgroundTasks, File, UploadFile, Depends, Request
+from fastapi import APIRouter, BackgroundTasks, File, Header, UploadFile, Depends, Request
 from typing import Dict, Any
-from controllers import upload_file_service
-from lib import get_current_user
+from controllers import upload_file_service, init_upload_service, commit_upload_service, embedding_status_service
+from lib import get_current_user, EmbeddingStatusResponse, InitUploadRequest, CommitUploadRequest
 from lib.user import User
  
 router = APIRouter()
@@ -11,6 +11,35 @@ async def upload_file_endpoint(
     request: Request,
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
+    collection: str = Header(..., alias="collection"),
     current_user: User = Depends(get_current_user)
 ) -> Dict[str, Any]:
-    return await upload_file_service(request, background_tasks, file, current_user)
+    return await upload_file_service(request, background_tasks, file, collection, current_user)
+
+@router.post("/init")
+async def init_upload_endpoint(
+    request: Request,
+    body: InitUploadRequest,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    return await init_upload_service(request, body.file_name, current_user)
+
+@router.post("/{upload_id}/commit")
+async def commit_upload_endpoint(
+    request: Request,
+    upload_id: str,
+    body: CommitUploadRequest,
+    background_tasks: BackgroundTasks,
+    collection: str = Header(..., alias="collection"),
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    return await commit_upload_service(request, background_tasks, upload_id, body.file_hash, collection, current_user)
+
+@router.get("/status/{embedding_id}", response_model=EmbeddingStatusResponse)
+async def embedding_status_endpoint(
+    request: Request,
+    embedding_id: str,
+    wait: float = 0,
+    current_user: User = Depends(get_current_user)
+) -> EmbeddingStatusResponse:
+    return await embedding_status_service(request, embedding_id, wait)
@@ -1,14 +1,26 @@
 from .file_validation import file_validation
-from .embedding import process_embedding
-from .process_pdf import process_pdf
+from .file_hash import HashingReader, hash_file
+from .embedding import process_embedding, set_embedding_status
+from .embedding_queue import enqueue_embedding, run_embedding_worker
+from .chunking import chunk_text, chunk_text_by_page
+from .process_pdf import iter_pdf_pages, process_pdf, shutdown_render_pool
 from .photo_to_text import photo_to_text
 from .audio_to_text import audio_to_text
 from .video_to_text import video_to_text
 
 __all__ = [
     "file_validation",
+    "hash_file",
+    "HashingReader",
     "process_embedding",
+    "set_embedding_status",
+    "enqueue_embedding",
+    "run_embedding_worker",
     "process_pdf",
+    "chunk_text",
+    "chunk_text_by_page",
+    "iter_pdf_pages",
+    "shutdown_render_pool",
     "photo_to_text",
     "audio_to_text",
     "video_to_text",
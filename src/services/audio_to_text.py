@@ -1,13 +1,15 @@
 from lib import LLMClient
 from PIL import Image
 from io import BytesIO
+from typing import BinaryIO, Union
 
 
-def audio_to_text(audio: bytes, llm: LLMClient) -> str:
+async def audio_to_text(audio: Union[bytes, BinaryIO], llm: LLMClient) -> str:
     prompt = """You are a professional transcriber, and you have been asked to transcribe this audio file.
     Please write the transcription in as much detail as possible."""
 
 
-    audio_file = BytesIO(audio)
-    llm_response = llm.summarize_file(prompt, audio_file)
+    # a file object is uploaded as it is, without reading it into memory first
+    audio_file = BytesIO(audio) if isinstance(audio, bytes) else audio
+    llm_response = await llm.summarize_file(prompt, audio_file)
     return str(llm_response)
\ No newline at end of file
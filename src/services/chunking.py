@@ -0,0 +1,37 @@
+import re
+from typing import List, Optional
+
+# longest chunk in characters, about 500 tokens of English text
+CHUNK_SIZE = 2000
+
+# a sentence with its trailing whitespace, or a run of text without sentence punctuation; compiled once
+# so the scan runs in the regex engine instead of a Python loop over characters
+SENTENCE_REGEX = re.compile(r"[^.!?\n]*(?:[.!?]+|\n+|$)\s*")
+
+
+def chunk_text(text: str, max_chars: int = CHUNK_SIZE) -> List[str]:
+    # sentences are packed greedily into chunks of up to max_chars; a single sentence longer than that
+    # is split at max_chars
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for match in SENTENCE_REGEX.finditer(text):
+        sentence = match.group()
+        if not sentence:
+            continue
+        if size + len(sentence) > max_chars and current:
+            chunks.append("".join(current).strip())
+            current, size = [], 0
+        while len(sentence) > max_chars:
+            chunks.append(sentence[:max_chars].strip())
+            sentence = sentence[max_chars:]
+        current.append(sentence)
+        size += len(sentence)
+    if current:
+        chunks.append("".join(current).strip())
+    return [chunk for chunk in chunks if chunk]
+
+
+def chunk_text_by_page(pages: List[str]) -> List[Optional[str]]:
+    # one chunk per page, so chunk i lines up with the image of page i; pages without text are None
+    return [page.strip() or None for page in pages]
@@ -1,19 +1,84 @@
+import asyncio
 import os
-import json
-from lib import CromaDBClient, get_env, get_croma_client, FILE_TYPE_MAP, get_s3_pool, get_llm_client, get_embedding_client
+import numpy as np
+import orjson
+from lib import CromaDBClient, EmbeddingsCache, RedisClient, encode_embedding, get_croma_client, get_file_cache_client, FILE_CATEGORIES, get_s3_pool, get_llm_client, get_embedding_client
 from lib.models import EmbeddingStatusResponse
-from typing import Dict, Any
-from fastapi import Request, UploadFile, Header
-from .process_pdf import process_pdf
+from typing import AsyncGenerator, Dict, Any, Optional, Union
+from contextlib import aclosing
+from fastapi import Request, UploadFile
+from .chunking import chunk_text, chunk_text_by_page
+from .process_pdf import PAGE_SEPARATOR, extract_pdf_text, render_pdf_page_batches
 from .photo_to_text import photo_to_text
 from .audio_to_text import audio_to_text
 from .video_to_text import video_to_text
 
-async def process_embedding(hash: str, embedding_id: str, file: UploadFile, request: Request, server: str,  collection: str = Header(..., alias="collection")) -> None:
+EMBEDDING_STATUS_TTL = 3600
+# photo batches waiting between rendering and embedding; rendering pauses while this many wait
+PHOTO_PIPELINE_DEPTH = 4
+
+
+async def _single_batch(photos: list[bytes]) -> AsyncGenerator[list[bytes], None]:
+    yield photos
+
+
+async def _feed_batches(batches: AsyncGenerator[list[bytes], None], queue: "asyncio.Queue[Union[list[bytes], Exception, None]]") -> None:
+    # The end of the batches is queued as None and a failed render as its exception, so the consumer
+    # always has an item to act on
+    async with aclosing(batches):
+        try:
+            async for batch in batches:
+                await queue.put(batch)
+        except Exception as e:
+            await queue.put(e)
+            return
+    await queue.put(None)
+
+
+async def set_embedding_status(file_cache_client: RedisClient, embedding_id: str, status: str) -> None:
+    # The status is published on its channel in the same round-trip, so clients waiting on it are
+    # answered without polling
+    async with file_cache_client.pipeline() as pipe:
+        pipe.set(f"embedding_status:{embedding_id}", status, ex=EMBEDDING_STATUS_TTL)
+        pipe.publish(f"embed:status:{embedding_id}", status)
+        await pipe.execute()
+
+async def add_cached_embeddings(hash: str, request: Request, server: str, collection: str) -> bool:
+    # A file embedded before, for another collection, still has its documents and vectors cached; they
+    # are added to this collection as they are instead of embedding the file again. False on a miss.
+    embeddings_cache = EmbeddingsCache(get_file_cache_client(request), get_embedding_client(request).model)
+    cached = await embeddings_cache.get(hash)
+    if cached is None:
+        return False
+    document_ids, document_embeddings = cached
+    added = get_croma_client(request).add_documents_batch(
+        collection_name=collection,
+        ids=document_ids,
+        uris=[server] * len(document_ids),
+        embeddings=document_embeddings,
+        metadatas=[{"hash": hash}] * len(document_ids)
+    )
+    if not added:
+        raise RuntimeError(f"Adding the documents of {hash} to collection {collection} failed")
+    await embeddings_cache.mark_indexed(hash, collection)
+    return True
+
+async def process_embedding(hash: str, embedding_id: str, file: UploadFile, request: Request, server: str, collection: str) -> None:
+
+    file_cache_client = get_file_cache_client(request)
+    await set_embedding_status(file_cache_client, embedding_id, "Processing")
+    try:
+        await embed_file(hash, embedding_id, file, request, server, collection)
+    except Exception:
+        await set_embedding_status(file_cache_client, embedding_id, "Failed")
+        raise
+    await set_embedding_status(file_cache_client, embedding_id, "Completed")
+
+async def embed_file(hash: str, embedding_id: str, file: UploadFile, request: Request, server: str, collection: str) -> None:
 
-    env = get_env(request)
     croma_client = get_croma_client(request)
     s3_pool = get_s3_pool(request)
+    bucket_name = s3_pool.bucket
     llm_client = get_llm_client(request)
     embedding_client = get_embedding_client(request)
     
@@ -24,58 +89,133 @@ async def process_embedding(hash: str, embedding_id: str, file: UploadFile, requ
     if file_type is None:
         raise ValueError("File type not set")
     
-    if file_type not in FILE_TYPE_MAP:
+    if file_type not in FILE_CATEGORIES:
         raise ValueError(f"Unsupported file type: {file_type}")
     
-    file_content = file.file.read()
+    file.file.seek(0)
+    # audio and video go to the LLM as the spooled upload itself; only the types that are parsed here
+    # read the content into memory
+    file_content = b""
+    if file_type in ("PDF", "TXT", "PHO"):
+        file_content = await asyncio.to_thread(file.file.read)
 
     extracted_text: str = ""
-    photos: list[bytes] = []
+    photo_batches: Optional[AsyncGenerator[list[bytes], None]] = None
+
+    # collected for a single batched insert into the collection once the file is processed
+    document_ids: list[str] = []
+    document_embeddings: list[np.ndarray] = []
 
+    # blocking extraction runs in a worker thread so the event loop keeps serving requests meanwhile;
+    # photo descriptions and audio and video transcription go through the async LLM client and are
+    # awaited directly
     if file_type == "PDF":
-        extracted_text, photos = process_pdf(file_content)
+        # the text comes first; page images are rendered batch by batch while it is chunked and
+        # embedded, and are consumed by the photo pipeline below
+        extracted_text = await asyncio.to_thread(extract_pdf_text, file_content)
+        photo_batches = render_pdf_page_batches(file_content)
     elif file_type == "TXT":
         extracted_text = file_content.decode("utf-8")
     elif file_type == "PHO":
-        extracted_text = photo_to_text(file_content, llm_client)
-        photos = [file_content]
+        extracted_text = await photo_to_text(file_content, llm_client)
+        photo_batches = _single_batch([file_content])
     elif file_type == "AUD":
-        extracted_text = audio_to_text(file_content)
+        extracted_text = await audio_to_text(file.file, llm_client)
     elif file_type == "VID":
-        extracted_text = video_to_text(file_content)
+        extracted_text = await video_to_text(file.file, llm_client)
     else:
         raise ValueError(f"Unsupported file type: {file_type}")
 
+    # page chunks line up with page images, so a page without text keeps its place as None
+    text_chunks: list[Optional[str]] = []
     if extracted_text:
-        if "/d/=/-t/" in extracted_text:
-            extracted_text_by_page = extracted_text.split("/d/=/-t/")
+        if PAGE_SEPARATOR in extracted_text:
+            extracted_text_by_page = extracted_text.split(PAGE_SEPARATOR)
             text_chunks = chunk_text_by_page(extracted_text_by_page)
         else:   
             text_chunks = chunk_text(extracted_text)
-        chunck_id = 0
-        embeding_data = {"verison": "0.1.0" ,"text_chunks": len(text_chunks), "photos": len(photos), "embedding_id": embedding_id, "hash": hash, "related_data": [], "orignal_name": original_name, "orignal_type": original_extension}
-        for chunk in text_chunks:
-            chunck_id += 1
-            embedding = await embedding_client.get_text_embedding(chunk)
-            croma_client.add_document(collection_name=collection, uri=server, embeddings=embedding, hash=hash)
-            await s3_pool.upload_file(str(env["BUCKET_NAME"]), f"{hash}/embedings/{chunck_id}.TXT", chunk.encode("utf-8"))
-            await s3_pool.upload_file(str(env["BUCKET_NAME"]), f"{hash}/embedings/{chunck_id}.TXT.ENB", json.dumps(embedding).encode("utf-8"))
-    if photos:
-        formatted_photo_data = [format_photo_data(photo) for photo in photos]
-        chunck_id = 0
-        for photo_data in formatted_photo_data:
-            chunck_id += 1
-            if text_chunks[chunck_id-1] == None:
-                photo_discription = photo_to_text(photo_data, llm_client)
-                photo_discription = chunk_text(extracted_text)
-                embedding = await embedding_client.get_image_embedding(photo_discription[0], photo_data)
-            else:
-                embedding = await embedding_client.get_image_embedding(text_chunks[chunck_id-1], photo_data)
-                
-            croma_client.add_document(collection_name=collection, uri=server, embeddings=embedding, hash=hash)
-            await s3_pool.upload_file(str(env["BUCKET_NAME"]), f"{hash}/embedings/{chunck_id}.PHO", json.dumps(photo_data).encode("utf-8"))
-            await s3_pool.upload_file(str(env["BUCKET_NAME"]), f"{hash}/embedings/{chunck_id}.PHO.ENB", json.dumps(embedding).encode("utf-8"))
+    # Small per-chunk objects would each pay a full S3 request, so the text chunks of a file are stored
+    # as one JSON list (chunks.TXT) and every embedding as one file of fixed-size records in document
+    # order (embeddings.ENB), each int8 with its scale (see lib.encode_embedding); a single embedding
+    # can be read with a range GET. The float32 vectors still go to the collection and the embeddings
+    # cache. Photos are large enough to keep as objects of their own.
+    # Every upload and the text embedding start as tasks, so they run while the photo pipeline renders
+    # and embeds the next batch.
+    uploads: list["asyncio.Task[Any]"] = []
+    text_embedding: Optional["asyncio.Task[np.ndarray]"] = None
+    photo_count = 0
+    try:
+        embedded_chunks = [(chunck_id, chunk) for chunck_id, chunk in enumerate(text_chunks, start=1) if chunk]
+        if embedded_chunks:
+            text_embedding = asyncio.create_task(embedding_client.get_text_embeddings([chunk for _, chunk in embedded_chunks]))
+            uploads.append(asyncio.create_task(s3_pool.upload_file(bucket_name, f"{hash}/embedings/chunks.TXT", orjson.dumps(text_chunks))))
+        photo_ids: list[str] = []
+        photo_embeddings: list[np.ndarray] = []
+        if photo_batches is not None:
+            queue: "asyncio.Queue[Union[list[bytes], Exception, None]]" = asyncio.Queue(maxsize=PHOTO_PIPELINE_DEPTH)
+            producer = asyncio.create_task(_feed_batches(photo_batches, queue))
+            try:
+                while (batch := await queue.get()) is not None:
+                    if isinstance(batch, Exception):
+                        raise batch
+                    # photo i goes with text chunk i, the text of its page; photos without one are described
+                    # by the LLM instead, all of a batch's descriptions requested together
+                    photo_texts = [text_chunks[index] if index < len(text_chunks) else None for index in range(photo_count, photo_count + len(batch))]
+                    untitled = [offset for offset, text in enumerate(photo_texts) if text is None]
+                    descriptions = await asyncio.gather(*(photo_to_text(batch[offset], llm_client) for offset in untitled))
+                    for offset, description in zip(untitled, descriptions):
+                        photo_texts[offset] = description
+                    # the photos of a batch are embedded in as few provider requests as the client allows
+                    batch_embeddings = await embedding_client.get_image_embeddings(list(zip(photo_texts, batch)))
+                    for chunck_id, (photo_data, embedding) in enumerate(zip(batch, batch_embeddings), start=photo_count + 1):
+                        photo_ids.append(f"{hash}/{chunck_id}.PHO")
+                        photo_embeddings.append(embedding)
+                        uploads.append(asyncio.create_task(s3_pool.upload_file(bucket_name, f"{hash}/embedings/{chunck_id}.PHO", photo_data)))
+                    photo_count += len(batch)
+            finally:
+                producer.cancel()
+        if text_embedding is not None:
+            for (chunck_id, _), embedding in zip(embedded_chunks, await text_embedding):
+                document_ids.append(f"{hash}/{chunck_id}.TXT")
+                document_embeddings.append(embedding)
+        document_ids.extend(photo_ids)
+        document_embeddings.extend(photo_embeddings)
+        embedding_records = [encode_embedding(embedding) for embedding in document_embeddings]
+        if embedding_records:
+            uploads.append(asyncio.create_task(s3_pool.upload_file(bucket_name, f"{hash}/embedings/embeddings.ENB", b"".join(embedding_records))))
+        await asyncio.gather(*uploads)
+    except BaseException:
+        for task in [*uploads, text_embedding]:
+            if task is not None:
+                task.cancel()
+        raise
+    embeding_data = {
+        "verison": "0.3.0",
+        "text_chunks": len(text_chunks),
+        "photos": photo_count,
+        "embedding_id": embedding_id,
+        "hash": hash,
+        "related_data": [],
+        "orignal_name": original_name,
+        "orignal_type": original_extension,
+        # the record at index i of embeddings.ENB belongs to documents[i]
+        "documents": [document_id.split("/", 1)[1] for document_id in document_ids],
+        "embedding_record_size": len(embedding_records[0]) if embedding_records else 0
+    }
 
+    if document_ids:
+        added = croma_client.add_documents_batch(
+            collection_name=collection,
+            ids=document_ids,
+            uris=[server] * len(document_ids),
+            embeddings=document_embeddings,
+            metadatas=[{"hash": hash}] * len(document_ids)
+        )
+        if not added:
+            raise RuntimeError(f"Adding the documents of {hash} to collection {collection} failed")
+        # cached only once the collection has the documents, or re-uploads would be skipped as duplicates
+        # of content that was never stored
+        await EmbeddingsCache(get_file_cache_client(request), embedding_client.model).set(hash, document_ids, document_embeddings, collection)
     
-    await s3_pool.upload_file(str(env["BUCKET_NAME"]), f"{hash}/embedings/data.json", json.dumps(embeding_data).encode("utf-8"))
+    await s3_pool.upload_file(bucket_name, f"{hash}/embedings/data.json", orjson.dumps(embeding_data))
     
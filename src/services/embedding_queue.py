@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import tempfile
+from typing import Any, Dict
+
+import orjson
+from fastapi import FastAPI, Request, UploadFile
+
+from lib import get_file_cache_client, get_general_cache_client, get_s3_pool
+from .embedding import add_cached_embeddings, process_embedding, set_embedding_status
+from .file_validation import file_validation
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_QUEUE = "embed:queue"
+# jobs taken off the queue and processed together per round
+EMBEDDING_BATCH_SIZE = 32
+# how long a round waits for more jobs once it has its first one
+EMBEDDING_BATCH_WINDOW = 0.1
+# how long a blocking pop waits before the worker loops again
+EMBEDDING_POLL_TIMEOUT = 5
+DOWNLOAD_SPOOL_SIZE = 1024 * 1024
+
+
+async def enqueue_embedding(request: Request, file_hash: str, embedding_id: str, server: str, file_name: str, collection: str) -> None:
+    # The stored object is embedded by the worker, so only the job description is queued, with the
+    # collection the upload asked for
+    general_cache_client = get_general_cache_client(request)
+    job = {"hash": file_hash, "embedding_id": embedding_id, "server": server, "file_name": file_name, "collection": collection}
+    await general_cache_client.client.lpush(EMBEDDING_QUEUE, orjson.dumps(job))
+
+
+async def run_embedding_worker(app: FastAPI) -> None:
+    # Started from the lifespan. Jobs are taken in rounds of up to EMBEDDING_BATCH_SIZE, so the rate
+    # of embedding work follows this loop rather than the rate of uploads.
+    request = Request({"type": "http", "app": app})
+    client = get_general_cache_client(request).client
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            popped = await client.brpop(EMBEDDING_QUEUE, timeout=EMBEDDING_POLL_TIMEOUT)
+            if popped is None:
+                continue
+            jobs = [popped[1]]
+            deadline = loop.time() + EMBEDDING_BATCH_WINDOW
+            while len(jobs) < EMBEDDING_BATCH_SIZE:
+                queued = await client.rpop(EMBEDDING_QUEUE, EMBEDDING_BATCH_SIZE - len(jobs))
+                if queued:
+                    jobs.extend(queued)
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                popped = await client.brpop(EMBEDDING_QUEUE, timeout=remaining)
+                if popped is None:
+                    break
+                jobs.append(popped[1])
+        except Exception as e:
+            logger.warning("Reading the embedding queue failed: %s", e)
+            await asyncio.sleep(EMBEDDING_POLL_TIMEOUT)
+            continue
+
+        results = await asyncio.gather(
+            *(run_embedding_job(request, orjson.loads(job)) for job in jobs),
+            return_exceptions=True
+        )
+        for job, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                logger.error("Embedding job %s failed: %s", job, result)
+
+
+async def run_embedding_job(request: Request, job: Dict[str, Any]) -> None:
+    # The upload is closed once its request ends, so the content is read back from its server
+    s3_pool = get_s3_pool(request)
+    file_cache_client = get_file_cache_client(request)
+    file_hash = job["hash"]
+    # content embedded for another collection only needs its cached documents added to this one
+    try:
+        reused = await add_cached_embeddings(file_hash, request, job["server"], job["collection"])
+    except Exception:
+        await set_embedding_status(file_cache_client, job["embedding_id"], "Failed")
+        raise
+    if reused:
+        await set_embedding_status(file_cache_client, job["embedding_id"], "Completed")
+        return
+    spool = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_SIZE)
+    file = UploadFile(file=spool, filename=job["file_name"])  # type: ignore[arg-type]
+    try:
+        if not await s3_pool.download_file_server(s3_pool.bucket, f"{file_hash}/{file_hash}", spool, job["server"]):  # type: ignore[arg-type]
+            await set_embedding_status(file_cache_client, job["embedding_id"], "Failed")
+            return
+        await process_embedding(file_hash, job["embedding_id"], file_validation(file), request, job["server"], job["collection"])
+    finally:
+        await file.close()
@@ -2,17 +2,18 @@ import os
 
 from fastapi import UploadFile
 
-from lib import FILE_TYPE_MAP
+from lib import classify
 
 
 def file_validation(file: UploadFile) -> UploadFile:
     _, ext = os.path.splitext(str(file.filename))
     ext = ext.lower()
 
-    if ext not in FILE_TYPE_MAP:
+    file_type = classify(str(file.filename))
+    if file_type is None:
         raise ValueError(f"Unsupported file type: {ext}")
 
-    setattr(file, 'file_type', FILE_TYPE_MAP[ext])
+    setattr(file, 'file_type', file_type)
     setattr(file, 'file_extension', ext)
     setattr(file, 'file_name', file.filename)
     return file
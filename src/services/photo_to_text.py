@@ -1,18 +1,31 @@
+import asyncio
 from lib import LLMClient
 from PIL import Image
-import io
+from io import BytesIO
 
+# leading bytes of the image formats the LLM accepts as they are
+SUPPORTED_PHOTO_SIGNATURES = (b"\xff\xd8\xff", b"\x89PNG\r\n\x1a\n")
 
-def photo_to_text(photo: bytes, llm: LLMClient) -> str:
+
+def is_supported_photo(photo: bytes) -> bool:
+    return photo.startswith(SUPPORTED_PHOTO_SIGNATURES) or (photo[:4] == b"RIFF" and photo[8:12] == b"WEBP")
+
+
+def _to_png(photo: bytes) -> bytes:
+    with Image.open(BytesIO(photo)) as img:
+        img_bytes = BytesIO()
+        img.save(img_bytes, format="PNG")
+    return img_bytes.getvalue()
+
+
+async def photo_to_text(photo: bytes, llm: LLMClient) -> str:
     prompt = """You are a professional photographer and you have taken this photo.
     Please write a description of the photo in a few sentences."""
 
-    img = Image.open(photo)
-
-    # Convert the PIL Image back to bytes using BytesIO
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format=img.format or 'PNG')
-    img_bytes.seek(0)
+    # JPEG, PNG and WEBP are sent as they are; only other formats (TIFF, HEIC, ...) are decoded and
+    # converted to PNG, in a worker thread
+    if not is_supported_photo(photo):
+        photo = await asyncio.to_thread(_to_png, photo)
 
-    llm_response = llm.summarize_file(prompt, img_bytes)
-    return str(llm_response)
\ No newline at end of file
+    llm_response = await llm.summarize_file(prompt, BytesIO(photo))
+    return str(llm_response)
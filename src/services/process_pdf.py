@@ -1,26 +1,101 @@
-from typing import List, Tuple
-from pdf2image import convert_from_bytes
+import asyncio
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import AsyncGenerator, Deque, Iterator, List, Optional, Tuple
 import fitz
-import io
 
-def process_pdf(pdf_bytes: bytes) -> Tuple[str, List[bytes]]:
+PAGE_SEPARATOR = "/d/=/-t/"
+PAGE_DPI = 300
+# pages are encoded as JPEG by MuPDF itself, several times faster to encode than PNG at 300 DPI and
+# smaller for photographic content; the quality is well above what the embedding model can tell apart
+PAGE_JPEG_QUALITY = 85
+# rasterizing is CPU bound, so pages are rendered in worker processes; every uvicorn worker has its own
+# pool, so the cores are split between them
+PDF_RENDER_PROCESSES = max((os.cpu_count() or 1) // max(int(os.getenv("WEB_CONCURRENCY", "1")), 1), 1)
+# pages rendered, embedded and uploaded together; each batch sends the document to its render process
+# once, so batches are kept a few times larger than the embedding client's request size
+PAGE_BATCH_SIZE = 16
 
+_render_pool: Optional[ProcessPoolExecutor] = None
 
-    extracted_text = []
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    
-    for page in doc:
-        text = page.get_text("text")
-        extracted_text.append(text.strip())
 
-    extracted_text_str = "/d/=/-t/".join(extracted_text)
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    if _render_pool is None:
+        # spawned rather than forked; the server process has threads that a fork would copy mid-state
+        _render_pool = ProcessPoolExecutor(max_workers=PDF_RENDER_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+    return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    # stops the render workers at shutdown; renders still queued are dropped
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=True, cancel_futures=True)
+        _render_pool = None
+
+
+def _render_page(page: "fitz.Page") -> bytes:
+    return page.get_pixmap(dpi=PAGE_DPI).tobytes("jpg", jpg_quality=PAGE_JPEG_QUALITY)
+
+
+def _render_page_shard(pdf_bytes: bytes, start: int, end: int) -> List[bytes]:
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return [_render_page(doc[number]) for number in range(start, end)]
+
 
-    images = convert_from_bytes(pdf_bytes, dpi=300)
+def iter_pdf_pages(pdf_bytes: bytes) -> Iterator[Tuple[str, bytes]]:
+    # one page is rendered at a time, so memory is bounded by a single page image rather than the
+    # whole document
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for page in doc:
+            yield page.get_text("text").strip(), _render_page(page)
 
+
+def extract_pdf_text(pdf_bytes: bytes) -> str:
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return PAGE_SEPARATOR.join(page.get_text("text").strip() for page in doc)
+
+
+async def render_pdf_page_batches(pdf_bytes: bytes) -> AsyncGenerator[List[bytes], None]:
+    # pages are rendered in batches of PAGE_BATCH_SIZE and yielded in page order as each batch is done,
+    # so the first pages can be embedded and uploaded while the later ones render; at most one batch
+    # per render process is in flight ahead of the consumer
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page_count = doc.page_count
+    bounds = list(range(0, page_count, PAGE_BATCH_SIZE)) + [page_count]
+    if page_count <= PAGE_BATCH_SIZE or PDF_RENDER_PROCESSES == 1:
+        # a single batch, or a single render process, gains nothing from sending the document to the pool
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            yield await asyncio.to_thread(_render_page_shard, pdf_bytes, start, end)
+        return
+
+    loop = asyncio.get_running_loop()
+    pool = _get_render_pool()
+    shards = iter(zip(bounds[:-1], bounds[1:]))
+    pending: Deque["asyncio.Future[List[bytes]]"] = deque()
+    try:
+        for start, end in islice(shards, PDF_RENDER_PROCESSES):
+            pending.append(loop.run_in_executor(pool, _render_page_shard, pdf_bytes, start, end))
+        while pending:
+            images = await pending.popleft()
+            for start, end in islice(shards, 1):
+                pending.append(loop.run_in_executor(pool, _render_page_shard, pdf_bytes, start, end))
+            yield images
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def process_pdf(pdf_bytes: bytes) -> Tuple[str, List[bytes]]:
+
+    extracted_text = []
     page_to_image = []
-    for image in images:
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='PNG')
-        page_to_image.append(img_byte_arr.getvalue())
+    for text, image in iter_pdf_pages(pdf_bytes):
+        extracted_text.append(text)
+        page_to_image.append(image)
 
-    return extracted_text_str, page_to_image
+    return PAGE_SEPARATOR.join(extracted_text), page_to_image
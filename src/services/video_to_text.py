@@ -1,13 +1,15 @@
 from lib import LLMClient
 from PIL import Image
 from io import BytesIO
+from typing import BinaryIO, Union
 
 
-def video_to_text(video: bytes, llm: LLMClient) -> str:
+async def video_to_text(video: Union[bytes, BinaryIO], llm: LLMClient) -> str:
     prompt = """You are a professional transcriber, and you have been asked to transcribe this video file.
     Please write the transcription in as much detail as possible."""
 
 
-    video_file = BytesIO(video)
-    llm_response = llm.summarize_file(prompt, video_file)
+    # a file object is uploaded as it is, without reading it into memory first
+    video_file = BytesIO(video) if isinstance(video, bytes) else video
+    llm_response = await llm.summarize_file(prompt, video_file)
     return str(llm_response)
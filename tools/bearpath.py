@@ -5,7 +5,7 @@ import json
 import os
 import re
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 ROUTES_BASE = os.path.join("src", "routes")
 
@@ -32,8 +32,13 @@ router.include_router(base_router)
 __endpoints__: Dict[str, Any] = {}
 '''
 
-ENDPOINT_REGEX = re.compile(r"""@router\.(get|post|put|delete|patch)\(\s*["']([^"']+)["']\s*\)""", re.IGNORECASE)
-DECORATOR_REGEX = re.compile(r"@router\.(get|post|put|delete|patch)\(\s*['\"]([^'\"]+)['\"]\s*\)", re.IGNORECASE)
+ROUTER_METHODS = ("get", "post", "put", "delete", "patch")
+
+# the generated __endpoints__ block of a route module, compiled once for every file
+ENDPOINTS_BLOCK_REGEX = re.compile(
+    r"(__endpoints__:\s*(Dict|dict)\[str,\s*Any\]\s*=\s*)\{[\s\S]*?\}\n\n",
+    re.MULTILINE
+)
 
 VERBOSE = False
 
@@ -63,49 +68,16 @@ def create_route(route_path: str) -> None:
     ensure_directory_structure(route_path)
     verbose_print(f"Route structure for '{route_path}' created under {ROUTES_BASE}")
 
-def extract_full_function(content: str, method: str, endpoint: str) -> str:
-    lines = content.splitlines()
-    function_found = False
-    extracted_lines = []
-    indent_level = None
-
-    for i, line in enumerate(lines):
-        stripped_line = line.strip()
-        match = DECORATOR_REGEX.match(stripped_line)
-        if match:
-            matched_method, route = match.groups()
-            if function_found:
-                break
-            if matched_method.lower() == method.lower() and route == endpoint:
-                function_found = True
-                extracted_lines.append(line)
-                continue
-
-        if function_found:
-            if stripped_line.startswith("def "):
-                extracted_lines.append(line)
-                indent_level = len(line) - len(line.lstrip())
-                continue
-            if indent_level is not None and ((len(line) - len(line.lstrip())) < indent_level or stripped_line.startswith("@router")):
-                break
-            extracted_lines.append(line)
-    return "\n".join(extracted_lines) if extracted_lines else ""
-
-def parse_function_signature(func_source: str) -> dict[str, Any]:
-    signature = {}
-    try:
-        tree = ast.parse(func_source)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                for arg in node.args.args:
-                    arg_name = arg.arg
-                    arg_type = "Any"
-                    if arg.annotation:
-                        arg_type = ast.dump(arg.annotation)
-                    signature[arg_name] = arg_type
-    except Exception as e:
-        verbose_print(f"Error parsing function signature: {e}")
-    return signature
+def route_decorators(node: ast.AST) -> Iterator[Tuple[str, str]]:
+    for decorator in getattr(node, "decorator_list", []):
+        if not (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)):
+            continue
+        target = decorator.func.value
+        method = decorator.func.attr.lower()
+        if not (isinstance(target, ast.Name) and target.id == "router" and method in ROUTER_METHODS):
+            continue
+        if decorator.args and isinstance(decorator.args[0], ast.Constant) and isinstance(decorator.args[0].value, str):
+            yield method, decorator.args[0].value
 
 def extract_endpoints_from_file(file_path: Path) -> dict[str, Any]:
     endpoints: dict[str, Any] = {}
@@ -115,16 +87,27 @@ def extract_endpoints_from_file(file_path: Path) -> dict[str, Any]:
         verbose_print(f"Error reading {file_path}: {e}")
         return endpoints
 
-    for match in ENDPOINT_REGEX.finditer(content):
-        method, endpoint = match.groups()
-        full_function_text = extract_full_function(content, method, endpoint)
-        prameters = parse_function_signature(full_function_text)
-        endpoints[endpoint] = {
-            "method": method.upper(),
-            "description": "None",
-            "parameters": {k: {"type": v, "description": "None"} for k, v in prameters.items()},
-            "response": "None",
-        }
+    # one parse per file; the route and its parameters are read straight from each decorated function
+    try:
+        tree = ast.parse(content)
+    except SyntaxError as e:
+        verbose_print(f"Error parsing {file_path}: {e}")
+        return endpoints
+
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for method, endpoint in route_decorators(node):
+            parameters = {
+                arg.arg: ast.unparse(arg.annotation) if arg.annotation else "Any"
+                for arg in node.args.args
+            }
+            endpoints[endpoint] = {
+                "method": method.upper(),
+                "description": "None",
+                "parameters": {k: {"type": v, "description": "None"} for k, v in parameters.items()},
+                "response": "None",
+            }
     verbose_print(f"Extracted {len(endpoints)} endpoints from {file_path}")
     return endpoints
 
@@ -138,15 +121,10 @@ def update_file_endpoints(file_path: Path, silent: bool) -> dict[str, Any]:
         verbose_print(f"Error reading {file_path}: {e}")
         return endpoints
     
-    endpoints_pattern = re.compile(
-        r"(__endpoints__:\s*(Dict|dict)\[str,\s*Any\]\s*=\s*)\{[\s\S]*?\}\n\n",
-        re.MULTILINE
-    )
-
     if not silent:
-        if endpoints_pattern.search(content):
-            new_content = endpoints_pattern.sub(endpoints_block, content)
-        else:
+        # one scan both replaces the block and tells whether there was one
+        new_content, replaced = ENDPOINTS_BLOCK_REGEX.subn(endpoints_block, content)
+        if not replaced:
             lines = content.split("\n")
             insert_index = 0
             for i, line in enumerate(lines):
@@ -159,81 +137,76 @@ def update_file_endpoints(file_path: Path, silent: bool) -> dict[str, Any]:
         verbose_print(f"Updated endpoints in {file_path}")
         return endpoints
     else:
-        if endpoints_pattern.search(content):
-            new_content = endpoints_pattern.sub(" ", content)
-        else:
-            new_content = content
+        new_content = ENDPOINTS_BLOCK_REGEX.sub(" ", content)
         file_path.write_text(new_content)
         return endpoints
     
 
-def aggregate_directory_endpoints(dir_path: Path, silent: bool) -> Dict[str, Any]:
+def scan_directory(dir_path: Path) -> Tuple[List[Path], List[Path]]:
+    # one scandir per directory: its route modules (everything but __init__.py) and its route packages
+    # (subdirectories with an __init__.py), both sorted
+    py_files: List[Path] = []
+    subdirs: List[Path] = []
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".py") and entry.name != "__init__.py":
+                py_files.append(Path(entry.path))
+            elif entry.is_dir() and os.path.isfile(os.path.join(entry.path, "__init__.py")):
+                subdirs.append(Path(entry.path))
+    return sorted(py_files), sorted(subdirs)
+
+def aggregate_directory_endpoints(py_files: List[Path], sub_aggregated: Dict[str, Any], file_endpoints: Dict[Path, Any], silent: bool) -> Dict[str, Any]:
     aggregated: Dict[str, Any] = {}
-    for file in sorted(dir_path.glob("*.py")):
-        if file.name == "__init__.py":
-            continue
+    for file in py_files:
         endpoints = update_file_endpoints(file, silent)
+        file_endpoints[file] = endpoints
         key = "/" if file.stem == "base" else "/" + file.stem
         aggregated[key] = endpoints
-    for subdir in sorted([d for d in dir_path.iterdir() if d.is_dir()]):
-        init_file = subdir / "__init__.py"
-        if init_file.exists():
-            sub_aggregated = aggregate_directory_endpoints(subdir, silent)
-            aggregated["/" + subdir.name] = sub_aggregated
-
+    aggregated.update(sub_aggregated)
     return aggregated
 
-def update_init_imports(dir_path: Path) -> str:
+def update_init_imports(py_files: List[Path], subdirs: List[Path]) -> str:
     lines = []
     lines.append("# This file is auto-generated by bearpath.py. Do not edit directly.")
     lines.append("")
     lines.append("from fastapi import APIRouter")
     lines.append("from typing import Dict, Any")
     
-    base_file = dir_path / "base.py"
-    if base_file.exists():
+    has_base = any(file.name == "base.py" for file in py_files)
+    modules = [file.stem for file in py_files if file.name != "base.py"]
+    if has_base:
         lines.append("from .base import router as base_router")
     
-    for file in sorted(dir_path.glob("*.py")):
-        if file.name in ["__init__.py", "base.py"]:
-            continue
-        module_name = file.stem  # e.g. "id"
+    for module_name in modules:  # e.g. "id"
         router_var = f"{module_name}_router"
         lines.append(f"from .{module_name} import router as {router_var}")
     
-    for subdir in sorted([d for d in dir_path.iterdir() if d.is_dir()]):
-        init_file = subdir / "__init__.py"
-        if init_file.exists():
-            router_var = f"{subdir.name}_router"
-            lines.append(f"from .{subdir.name} import router as {router_var}")
+    for subdir in subdirs:
+        router_var = f"{subdir.name}_router"
+        lines.append(f"from .{subdir.name} import router as {router_var}")
     
     lines.append("")
     lines.append("router = APIRouter()")
     
-    if base_file.exists():
+    if has_base:
         lines.append("router.include_router(base_router, prefix='')")
     
-    for file in sorted(dir_path.glob("*.py")):
-        if file.name in ["__init__.py", "base.py"]:
-            continue
-        module_name = file.stem
+    for module_name in modules:
         router_var = f"{module_name}_router"
         lines.append(f"router.include_router({router_var}, prefix='/{module_name}')")
     
-    for subdir in sorted([d for d in dir_path.iterdir() if d.is_dir()]):
-        init_file = subdir / "__init__.py"
-        if init_file.exists():
-            router_var = f"{subdir.name}_router"
-            lines.append(f"router.include_router({router_var}, prefix='/{subdir.name}')")
+    for subdir in subdirs:
+        router_var = f"{subdir.name}_router"
+        lines.append(f"router.include_router({router_var}, prefix='/{subdir.name}')")
     
     lines.append("")
     return "\n".join(lines)
 
-def update_init_file(dir_path: Path, aggregated: Dict[str, Any], silent: bool) -> None:
+def update_init_file(dir_path: Path, aggregated: Dict[str, Any], silent: bool, py_files: List[Path], subdirs: List[Path]) -> None:
     init_file = dir_path / "__init__.py"
     free_line = "\n"
     
-    router_section = update_init_imports(dir_path)
+    router_section = update_init_imports(py_files, subdirs)
     
     if not silent:
         endpoints_block = f"__endpoints__: Dict[str, Any] = {json.dumps(aggregated, indent=4)}\n\n"
@@ -245,11 +218,13 @@ def update_init_file(dir_path: Path, aggregated: Dict[str, Any], silent: bool) -
     init_file.write_text(new_content)
     verbose_print(f"Updated init file endpoints in {init_file}")
 
-def update_all_inits(dir_path: Path, silent: bool) -> Dict[str, Any]:
-    aggregated = aggregate_directory_endpoints(dir_path, silent)
-    update_init_file(dir_path, aggregated, silent)
-    for subdir in [d for d in dir_path.iterdir() if d.is_dir()]:
-        update_all_inits(subdir, silent)
+def update_all_inits(dir_path: Path, silent: bool, file_endpoints: Dict[Path, Any]) -> Dict[str, Any]:
+    # each directory is scanned, and each of its files parsed and rewritten, exactly once; the packages
+    # below are handled first so their aggregates are reused for this directory's __init__.py
+    py_files, subdirs = scan_directory(dir_path)
+    sub_aggregated = {"/" + subdir.name: update_all_inits(subdir, silent, file_endpoints) for subdir in subdirs}
+    aggregated = aggregate_directory_endpoints(py_files, sub_aggregated, file_endpoints, silent)
+    update_init_file(dir_path, aggregated, silent, py_files, subdirs)
     return aggregated
 
 
@@ -258,22 +233,18 @@ def update_endpoints_in_path(silent: bool, verose: bool, no_output: bool, route_
         global VERBOSE
         VERBOSE = True
 
-    aggregated_files = {}
     if route_path:
         base = Path(ROUTES_BASE) / route_path.strip("/")
     else:
         base = Path(ROUTES_BASE)
 
-    for root, dirs, files in os.walk(base):
-        for file in files:
-            if file.endswith(".py") and file not in ("__init__.py",):
-                file_path = Path(root) / file
-                file_endpoints = update_file_endpoints(file_path, silent)
-                rel_path = file_path.relative_to(ROUTES_BASE).with_suffix("")
-                route_key = "/" + "/".join(rel_path.parts)
-                aggregated_files[route_key] = file_endpoints
-
-    aggregated_inits = update_all_inits(base, silent)
+    file_endpoints: Dict[Path, Any] = {}
+    aggregated_inits = update_all_inits(base, silent, file_endpoints)
+    aggregated_files = {}
+    for file_path, endpoints in sorted(file_endpoints.items()):
+        rel_path = file_path.relative_to(ROUTES_BASE).with_suffix("")
+        route_key = "/" + "/".join(rel_path.parts)
+        aggregated_files[route_key] = endpoints
 
     verbose_print(f"Aggregated endpoints: {aggregated_inits}")
     if not no_output:
@@ -1,9 +1,12 @@
+import ast
+import bisect
 import hashlib
 import json
 import os
 import re
 
 ERROR_DB = "error_codes.json" 
+ERROR_RE = re.compile(r"Error #\{error_code\}")
 
 def generate_error_code(file: str, func: str, line: int) -> str:
     identifier = f"{file}:{func}:{line}"
@@ -11,36 +14,50 @@ def generate_error_code(file: str, func: str, line: int) -> str:
 
 def preprocess_errors(directory: str) -> None:
     error_map = {}
-    
+
     for root, _, files in os.walk(directory):
         for file in files:
             if file.endswith(".py"):
                 file_path = os.path.join(root, file)
                 with open(file_path, "r") as f:
-                    lines = f.readlines()
+                    text = f.read()
+                # most files have no placeholder and are neither parsed nor rewritten
+                if not ERROR_RE.search(text):
+                    continue
+
+                function_starts = get_function_starts(text)
 
-                new_lines = []
-                for idx, line in enumerate(lines):
-                    match = re.search(r'Error #\{error_code\}', line)
-                    if match:
-                        func_name = get_function_name(lines, idx)
-                        error_code = generate_error_code(file, func_name, idx + 1)
-                        error_map[error_code] = {"file": file, "function": func_name, "line": idx + 1}
-                        line = line.replace("#{error_code}", error_code)
-                    new_lines.append(line)
+                def replace(match: re.Match[str]) -> str:
+                    line = text.count("\n", 0, match.start()) + 1
+                    func_name = get_function_name(function_starts, line)
+                    error_code = generate_error_code(file, func_name, line)
+                    error_map[error_code] = {"file": file, "function": func_name, "line": line}
+                    return f"Error {error_code}"
 
-                with open(file_path, "w") as f:
-                    f.writelines(new_lines)
+                new_text = ERROR_RE.sub(replace, text)
+                if new_text != text:
+                    with open(file_path, "w") as f:
+                        f.write(new_text)
 
     with open(ERROR_DB, "w") as db_file:
         json.dump(error_map, db_file, indent=4)
 
-def get_function_name(lines: list[str], idx: int) -> str:
+def get_function_starts(text: str) -> list[tuple[int, str]]:
+    """Line numbers and names of the function definitions in a file, in line order."""
+    try:
+        tree = ast.parse(text)
+    except SyntaxError:
+        return []
+    return sorted(
+        (node.lineno, node.name)
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    )
+
+def get_function_name(function_starts: list[tuple[int, str]], line: int) -> str:
     """Find the nearest function definition above the error line."""
-    for i in range(idx, -1, -1):
-        if lines[i].strip().startswith("def "):
-            return lines[i].split("(")[0].split()[1]
-    return "global"
+    index = bisect.bisect_right(function_starts, (line, "\uffff")) - 1
+    return function_starts[index][1] if index >= 0 else "global"
 
 if __name__ == "__main__":
     preprocess_errors("./src") 
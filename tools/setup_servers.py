@@ -1,5 +1,6 @@
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List
 
 import mysql.connector
@@ -7,6 +8,9 @@ import yaml
 from dotenv import load_dotenv
 from minio import Minio
 
+# first wait between MinIO probes, doubled after every failed probe up to the max
+MINIO_RETRY_DELAY = 0.5
+MINIO_MAX_RETRY_DELAY = 5
 
 def load_docker_compose_config() -> Dict[Any, Any]:
     with open("docker-compose.yml", "r") as file:
@@ -42,7 +46,8 @@ def create_mysql_databases(databases: List[str], host: str, port: int, user: str
     conn.close()
 
 def wait_for_minio(server_url: str, access_key: str, secret_key: str) -> None:
-    """Waits until MinIO server is ready."""
+    """Waits until MinIO server is ready, probing again sooner while it is starting up."""
+    delay = MINIO_RETRY_DELAY
     while True:
         try:
             client = Minio(server_url, access_key=access_key, secret_key=secret_key, secure=False)
@@ -51,18 +56,25 @@ def wait_for_minio(server_url: str, access_key: str, secret_key: str) -> None:
             break
         except Exception as e:
             print(f"Waiting for MinIO at {server_url}..." +  str(e))
-            time.sleep(5)
+            time.sleep(delay)
+            delay = min(delay * 2, MINIO_MAX_RETRY_DELAY)
+
+def create_minio_server_buckets(buckets: List[str], server: str, access_key: str, secret_key: str) -> None:
+    """Creates buckets in one MinIO server from an array."""
+    client = Minio(server, access_key=access_key, secret_key=secret_key, secure=False)
+    for bucket in buckets:
+        if not client.bucket_exists(bucket):
+            client.make_bucket(bucket)
+            print(f"Bucket {bucket} created on {server}.")
+        else:
+            print(f"Bucket {bucket} already exists on {server}.")
 
 def create_minio_buckets(buckets: List[str], servers: List[str], access_key: str, secret_key: str) -> None:
-    """Creates buckets in MinIO servers from an array."""
-    for server in servers:
-        client = Minio(server, access_key=access_key, secret_key=secret_key, secure=False)
-        for bucket in buckets:
-            if not client.bucket_exists(bucket):
-                client.make_bucket(bucket)
-                print(f"Bucket {bucket} created on {server}.")
-            else:
-                print(f"Bucket {bucket} already exists on {server}.")
+    """Creates buckets in MinIO servers from an array, all servers at once."""
+    with ThreadPoolExecutor(max_workers=max(len(servers), 1)) as executor:
+        futures = [executor.submit(create_minio_server_buckets, buckets, server, access_key, secret_key) for server in servers]
+        for future in futures:
+            future.result()
 
 def generate_env_file(config: Dict[Any, Any]) -> None:
     env_content = """
@@ -123,8 +135,11 @@ def main() -> None:
     minio_secret_key = config['services']['minio1']['environment']['MINIO_ROOT_PASSWORD']
     minio_buckets = ["uploads"]
     
-    for server in minio_servers:
-        wait_for_minio(server, minio_access_key, minio_secret_key)
+    # the servers boot at the same time, so they are waited for together
+    with ThreadPoolExecutor(max_workers=max(len(minio_servers), 1)) as executor:
+        futures = [executor.submit(wait_for_minio, server, minio_access_key, minio_secret_key) for server in minio_servers]
+        for future in futures:
+            future.result()
     create_minio_buckets(minio_buckets, minio_servers, minio_access_key, minio_secret_key)
     
     generate_env_file(config)